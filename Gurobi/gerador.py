@@ -1,8 +1,12 @@
 # -*- coding: utf-8 -*-
 import random
 import argparse
+import os
 import sys
 
+# instance_format.py fica na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 def gerar_instancia(args):
     """
     Função principal que gera os dados da instância com base nos argumentos.
@@ -123,6 +127,17 @@ def gerar_instancia(args):
         print(f"Erro ao escrever arquivo de instância: {e}")
         sys.exit(1) # Sinaliza um erro
 
+    # Versão binária (.nbi) da mesma instância, carregável via mmap
+    if args.bin:
+        from instance_format import tables_from_dicts, write_instance
+        tables = tables_from_dicts(employee_data, shift_data, shift_requirements,
+                                   meta={'source': 'gerador.py', 'params': vars(args)})
+        try:
+            write_instance('instancia_temp.nbi', tables)
+        except Exception as e:
+            print(f"Erro ao escrever arquivo de instância binário: {e}")
+            sys.exit(1)
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Gerador de Instâncias para o Modelo de Otimização")
     
@@ -133,6 +148,7 @@ if __name__ == "__main__":
     parser.add_argument('--max-skills', type=int, default=5, help='Max de habilidades por funcionário')
     parser.add_argument('--min-skills', type=int, default=2, help='Min de habilidades por funcionário')
     parser.add_argument('--max-unavailable', type=int, default=1, help='Max de dias indisponíveis')
+    parser.add_argument('--bin', action='store_true', help="Também grava 'instancia_temp.nbi' (formato binário)")
     
     args = parser.parse_args()
     
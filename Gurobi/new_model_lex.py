@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# Thompson (1997) – mesmo modelo de new_model_big.py, mas resolvido nível a
+# nível pelo driver lexicográfico de lex_mip.py em vez de len(E)+1 objetivos
+# hierárquicos (setObjectiveN) num único optimize().
+#
+# Cada nível tem teto de tempo e gap próprios, recebe o incumbente anterior
+# como MIP start e, ao fechar, fixa em 0 os arcos dominados. O tempo de cada
+# nível de senioridade vai para niveis_temp.csv.
+#
+# Entrada/saída iguais às de new_model_big.py: lê instancia_temp.nbi (se
+# existir) ou instancia_temp.py e grava resultado_temp.json e report_temp.txt.
+# Usa o Gurobi se houver licença; senão, o primeiro backend disponível.
+import json
+import sys
+import os
+import time
+
+# Módulos do GRASP/formulação ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from grasp_thompson_new3 import load_instance
+from precompute_cache import DerivedCache
+from lex_mip import (build_formulation, make_backend, GurobiBackend, solve_lexicographic,
+                     result_payload, level_report, write_level_csv)
+
+LAMBDA_LUNCH = 0.0          # ajuste se quiser penalizar almoço (ex.: 1.0)
+TIME_LIMIT = 1800           # total (s), como o TimeLimit dos outros scripts
+LEVEL0_TIME_LIMIT = 600     # nível 0 (turnos não alocados)
+LEVEL_TIME_LIMIT = 60       # cada nível de empregado
+LEVEL_GAP = None            # gap relativo por nível (None = ótimo)
+
+# -------------------------------------------------------------
+# 0) DADOS (instancia_temp.nbi ou instancia_temp.py)
+# -------------------------------------------------------------
+NOME_INSTANCIA = 'instancia_temp.nbi' if os.path.exists('instancia_temp.nbi') else 'instancia_temp.py'
+if not os.path.exists(NOME_INSTANCIA):
+    print("\nERRO: Arquivo 'instancia_temp.py' não encontrado.")
+    print("Por favor, execute o 'gerador.py' ou 'run_all.py' primeiro.")
+    sys.exit(1)
+
+try:
+    inst = load_instance(NOME_INSTANCIA, LAMBDA_LUNCH=LAMBDA_LUNCH, cache=DerivedCache(),
+                         require_candidates=False)
+except Exception as e:
+    print(f"\nERRO ao carregar '{NOME_INSTANCIA}': {e}")
+    sys.exit(1)
+print(f"[INFO] Dados da instância '{NOME_INSTANCIA}' carregados com sucesso.")
+
+# -------------------------------------------------------------
+# 1) FORMULAÇÃO E BACKEND
+# -------------------------------------------------------------
+t_build = time.perf_counter()
+form = build_formulation(inst)
+backend = make_backend('gurobi' if GurobiBackend.available() else 'auto', form, verbose=True)
+print(f"[INFO] Modelo montado em {time.perf_counter() - t_build:.2f} s "
+      f"({form.n_var} variáveis, {form.A.shape[0]} restrições, backend '{backend.name}')")
+print(f"[INFO] Limite inferior de turnos não alocados (fluxo máximo): {form.cover_lb}")
+
+# -------------------------------------------------------------
+# 2) OTIMIZAÇÃO NÍVEL A NÍVEL
+# -------------------------------------------------------------
+print(f"\n[INFO] Iniciando otimização lexicográfica (total {TIME_LIMIT} s, "
+      f"{LEVEL_TIME_LIMIT} s por nível)...\n")
+res = solve_lexicographic(form, backend, time_limit=TIME_LIMIT, mip_gap=LEVEL_GAP,
+                          level_time_limit=LEVEL_TIME_LIMIT,
+                          level_overrides={'unallocated': {'time_limit': LEVEL0_TIME_LIMIT}},
+                          verbose=True)
+
+# -------------------------------------------------------------
+# 3) RELATÓRIO DE SAÍDA
+# -------------------------------------------------------------
+NOME_JSON_SAIDA = 'resultado_temp.json'
+NOME_LOG_SAIDA = 'report_temp.txt'
+NOME_CSV_NIVEIS = 'niveis_temp.csv'
+
+write_level_csv(NOME_CSV_NIVEIS, res)
+print(f"Tempos por nível salvos em '{NOME_CSV_NIVEIS}'")
+
+if res.z is None:
+    print(f"\nOtimização terminada sem solução (status: {res.status}).")
+    sys.exit(1)
+
+print("Otimização concluída com sucesso!" if res.status == 'optimal'
+      else f"Otimização interrompida ({res.status}); usando o último incumbente.")
+dados_de_saida = result_payload(form, res)
+alocacoes_por_empregado = dados_de_saida["alocacoes"]
+turnos_nao_alocados = dados_de_saida["turnos_nao_alocados"]
+turnos_alocados_count = sum(len(al) for al in alocacoes_por_empregado.values())
+S = inst.S
+
+print("\n--- Tempo por nível (10 mais caros) ---")
+print(level_report(res, top=10))
+print(f"\nVerificação: {turnos_alocados_count} turnos alocados, {len(turnos_nao_alocados)} não alocados. Total: {turnos_alocados_count + len(turnos_nao_alocados)} (de {len(S)})")
+
+print(f"Salvando relatório em '{NOME_JSON_SAIDA}'...")
+try:
+    with open(NOME_JSON_SAIDA, "w", encoding="utf-8") as f:
+        json.dump(dados_de_saida, f, ensure_ascii=False, indent=4)
+    print(f"Relatório '{NOME_JSON_SAIDA}' salvo com sucesso!")
+except Exception as e:
+    print(f"Erro ao salvar JSON: {e}")
+
+print(f"Salvando log de texto em '{NOME_LOG_SAIDA}'...")
+try:
+    with open(NOME_LOG_SAIDA, "w", encoding="utf-8") as f:
+        f.write(f"Tempo de Execução ({backend.name}, lexicográfico): {res.runtime:.2f} segundos\n")
+        f.write(f"Status: {res.status}\n")
+        f.write(f"Turnos não alocados (Nível 0): {dados_de_saida['objetivo_nivel_0_nao_alocados']}\n\n")
+        f.write("--- Tempo por nível ---\n")
+        f.write(level_report(res) + "\n\n")
+        f.write("--- Alocações por Empregado ---\n")
+        for i, (e, alocados) in enumerate(alocacoes_por_empregado.items()):
+            f.write(f"  {e} ({len(alocados)} / {int(inst.cap_emp[i])} turnos): {alocados}\n")
+
+        f.write("\n--- Turnos NÃO Alocados ---\n")
+        if turnos_nao_alocados:
+            for s in turnos_nao_alocados:
+                f.write(f"  Turno (Dia: {s[0]}, ID: {s[1]})\n")
+        else:
+            f.write("  Todos os turnos foram alocados!\n")
+
+        f.write(f"\nVerificação: {turnos_alocados_count} turnos alocados, {len(turnos_nao_alocados)} não alocados. Total: {turnos_alocados_count + len(turnos_nao_alocados)} (de {len(S)})\n")
+    print(f"Log '{NOME_LOG_SAIDA}' salvo com sucesso!")
+except Exception as e:
+    print(f"Erro ao salvar Log TXT: {e}")
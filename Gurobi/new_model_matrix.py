@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+# Thompson (1997) – mesmo modelo de new_model_big.py, montado pela API
+# matricial do Gurobi (addMVar + matrizes esparsas do SciPy).
+#
+# x é indexado pelos arcos elegíveis (e, s) em ordem de empregado (CSR da
+# matriz de elegibilidade): os arcos de e ocupam o intervalo ptr[e]:ptr[e+1].
+# Cada família de restrições é uma matriz esparsa sobre esses arcos,
+# adicionada numa única chamada; não há laço Python por linha. É o builder das
+# instâncias de escala (1.000+ empregados) do run_all.py.
+#
+# Entrada/saída iguais às de new_model_big.py: lê instancia_temp.nbi (se
+# existir; gerador.py --bin) ou instancia_temp.py e grava resultado_temp.json,
+# report_temp.txt e model.lp.
+import gurobipy as gp
+from gurobipy import GRB
+
+import json
+import sys
+import os
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+# Módulos do GRASP (pré-processamento + cache) ficam na raiz do repositório
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from grasp_thompson_new3 import load_instance
+from precompute_cache import DerivedCache
+from coverage_bound import coverage_bound
+
+LAMBDA_LUNCH = 0.0  # ajuste se quiser penalizar almoço (ex.: 1.0)
+
+# -------------------------------------------------------------
+# 0) DADOS (instancia_temp.nbi ou instancia_temp.py)
+# -------------------------------------------------------------
+NOME_INSTANCIA = 'instancia_temp.nbi' if os.path.exists('instancia_temp.nbi') else 'instancia_temp.py'
+if not os.path.exists(NOME_INSTANCIA):
+    print("\nERRO: Arquivo 'instancia_temp.py' não encontrado.")
+    print("Por favor, execute o 'gerador.py' ou 'run_all.py' primeiro.")
+    sys.exit(1)
+
+try:
+    inst = load_instance(NOME_INSTANCIA, LAMBDA_LUNCH=LAMBDA_LUNCH, cache=DerivedCache(),
+                         require_candidates=False)
+except Exception as e:
+    print(f"\nERRO ao carregar '{NOME_INSTANCIA}': {e}")
+    sys.exit(1)
+print(f"[INFO] Dados da instância '{NOME_INSTANCIA}' carregados com sucesso.")
+
+t_build = time.perf_counter()
+
+E, S = inst.E, inst.S
+nE, nS, nD = inst.n_emp, inst.n_occ, len(inst.days)
+m_e = inst.cap_emp.astype(np.float64)
+
+# -------------------------------------------------------------
+# 1) ARCOS ELEGÍVEIS (índices inteiros)
+# -------------------------------------------------------------
+arc_e, arc_s = np.nonzero(inst.elig)              # ordenados por empregado
+nA = len(arc_e)
+arc = np.arange(nA)
+ones = np.ones(nA)
+v = inst.V[arc_e, arc_s]                          # v_es de cada arco
+ptr = np.searchsorted(arc_e, np.arange(nE + 1))   # arcos de e: ptr[e]:ptr[e+1]
+
+# -------------------------------------------------------------
+# 2) MATRIZES DAS RESTRIÇÕES (CSR)
+# -------------------------------------------------------------
+# (2) cobertura: linha s
+A_cover = sp.csr_matrix((ones, (arc_s, arc)), shape=(nS, nA))
+# (4) carga: linha e (também usada nas linhas de senioridade)
+A_load = sp.csr_matrix((ones, (arc_e, arc)), shape=(nE, nA))
+# (5) um turno por dia: uma linha por par (e, dia) com algum arco
+ed_keys, ed_row = np.unique(arc_e * nD + inst.day_occ[arc_s], return_inverse=True)
+A_day = sp.csr_matrix((ones, (ed_row, arc)), shape=(len(ed_keys), nA))
+# (6) sum_s x[e,s] - (m_e-1) y[e-1] <= 1, e = 1..E-1
+Y_up = sp.diags(m_e[1:] - 1, 0, shape=(nE - 1, nE), format='csr')
+# (7) m_e y[e] - sum_s x[e,s] <= 0, e = 0..E-2
+Y_flag = sp.diags(m_e[:-1], 0, shape=(nE - 1, nE), format='csr')
+
+# -------------------------------------------------------------
+# 3) MODELO, VARIÁVEIS E RESTRIÇÕES (em bloco)
+# -------------------------------------------------------------
+m = gp.Model("Thompson_1997_matriz")
+
+x = m.addMVar(nA, vtype=GRB.BINARY, name="x")
+u = m.addMVar(nS, vtype=GRB.BINARY, name="u")
+y = m.addMVar(nE, vtype=GRB.BINARY, name="y")
+
+m.addConstr(A_cover @ x + u == 1, name="cover")
+m.addConstr(A_load @ x <= m_e, name="max")
+m.addConstr(A_day @ x <= 1, name="oneday")
+if nE > 1:
+    m.addConstr(A_load[1:] @ x - Y_up @ y <= 1, name="seniority_up")
+    m.addConstr(Y_flag @ y - A_load[:-1] @ x <= 0, name="seniority_flag")
+
+# Limite exato do nível 0 sem as linhas de senioridade (coverage_bound.py)
+cov = coverage_bound(inst)
+m.addConstr(u.sum() >= cov.min_uncovered, name="cover_lb")
+print(f"[INFO] Limite inferior de turnos não alocados (fluxo máximo): {cov.min_uncovered}")
+
+# -------------------------------------------------------------
+# 4) MULTIOBJETIVO LEXICOGRÁFICO (PREEMPTIVO)
+#    Coeficientes por atributo (ObjN) só nos arcos de cada empregado.
+# -------------------------------------------------------------
+m.update()
+m.ModelSense = GRB.MINIMIZE
+m.NumObj = nE + 1
+
+m.params.ObjNumber = 0
+m.ObjNPriority = nE + 1
+m.ObjNWeight = 1.0
+m.ObjNName = "unallocated"
+u.ObjN = np.ones(nS)
+
+# Empregados: E[0] é mais sênior -> maior prioridade
+for i in range(nE):
+    m.params.ObjNumber = i + 1
+    m.ObjNPriority = nE - i
+    m.ObjNWeight = 1.0
+    m.ObjNName = f"diss_{E[i]}"
+    x[ptr[i]:ptr[i + 1]].ObjN = v[ptr[i]:ptr[i + 1]]
+
+m.update()
+print(f"[INFO] Modelo montado em {time.perf_counter() - t_build:.2f} s "
+      f"({nA} arcos, {m.NumConstrs} restrições)")
+
+# -------------------------------------------------------------
+# 5) OTIMIZAÇÃO
+# -------------------------------------------------------------
+m.Params.TimeLimit = 1800
+print(f"\n[INFO] Iniciando otimização com limite de tempo de {m.Params.TimeLimit} segundos...\n")
+
+m.optimize()
+
+# -------------------------------------------------------------
+# 6) RELATÓRIO DE SAÍDA (mesmos arquivos de new_model_big.py)
+# -------------------------------------------------------------
+NOME_JSON_SAIDA = 'resultado_temp.json'
+NOME_LOG_SAIDA = 'report_temp.txt'
+NOME_LP_MODELO = 'model.lp'
+NOME_ILP_INVIAVEL = 'modelo_inviavel.ilp'
+
+if m.status in (GRB.OPTIMAL, GRB.INTERRUPTED, GRB.TIME_LIMIT) and m.SolCount > 0:
+    print("Otimização concluída com sucesso!")
+
+    # --- 1. Processar resultados nas estruturas de dados ---
+    alocacoes_por_empregado = {e: [] for e in E}
+    for a in np.flatnonzero(x.X > 0.5).tolist():
+        alocacoes_por_empregado[E[arc_e[a]]].append(S[arc_s[a]])
+    turnos_alocados_count = sum(len(al) for al in alocacoes_por_empregado.values())
+    turnos_nao_alocados = [S[k] for k in np.flatnonzero(u.X > 0.5).tolist()]
+
+    # Pega o valor do objetivo Nível 0 (não alocados)
+    m.params.ObjNumber = 0
+    obj_nao_alocados = m.ObjNVal
+
+    # --- 2. Imprimir o relatório (para o log do subprocesso) ---
+    print("\n--- Alocações por Empregado ---")
+    for i, (e, alocados) in enumerate(alocacoes_por_empregado.items()):
+        print(f"  {e} ({len(alocados)} / {int(m_e[i])} turnos): {alocados}")
+
+    print("\n--- Turnos NÃO Alocados ---")
+    if turnos_nao_alocados:
+        for s in turnos_nao_alocados:
+            print(f"  Turno (Dia: {s[0]}, ID: {s[1]})")
+    else:
+        print("  Todos os turnos foram alocados!")
+    print(f"\nVerificação: {turnos_alocados_count} turnos alocados, {len(turnos_nao_alocados)} não alocados. Total: {turnos_alocados_count + len(turnos_nao_alocados)} (de {len(S)})")
+
+    # --- 3. Salvar o relatório em JSON ---
+    print(f"Salvando relatório em '{NOME_JSON_SAIDA}'...")
+    dados_de_saida = {
+        "status": "Solucao Encontrada",
+        "tempo_execucao_seg": m.Runtime,
+        "objetivo_nivel_0_nao_alocados": obj_nao_alocados,
+        "alocacoes": alocacoes_por_empregado,
+        "turnos_nao_alocados": turnos_nao_alocados
+    }
+    try:
+        with open(NOME_JSON_SAIDA, "w", encoding="utf-8") as f:
+            json.dump(dados_de_saida, f, ensure_ascii=False, indent=4)
+        print(f"Relatório '{NOME_JSON_SAIDA}' salvo com sucesso!")
+    except Exception as e:
+        print(f"Erro ao salvar JSON: {e}")
+
+    # --- 4. Salvar o log de texto ---
+    print(f"Salvando log de texto em '{NOME_LOG_SAIDA}'...")
+    try:
+        with open(NOME_LOG_SAIDA, "w", encoding="utf-8") as f:
+            f.write(f"Tempo de Execução (Gurobi): {m.Runtime:.2f} segundos\n")
+            f.write(f"Turnos não alocados (Nível 0): {obj_nao_alocados}\n\n")
+            f.write("--- Alocações por Empregado ---\n")
+            for i, (e, alocados) in enumerate(alocacoes_por_empregado.items()):
+                f.write(f"  {e} ({len(alocados)} / {int(m_e[i])} turnos): {alocados}\n")
+
+            f.write("\n--- Turnos NÃO Alocados ---\n")
+            if turnos_nao_alocados:
+                for s in turnos_nao_alocados:
+                    f.write(f"  Turno (Dia: {s[0]}, ID: {s[1]})\n")
+            else:
+                f.write("  Todos os turnos foram alocados!\n")
+
+            f.write(f"\nVerificação: {turnos_alocados_count} turnos alocados, {len(turnos_nao_alocados)} não alocados. Total: {turnos_alocados_count + len(turnos_nao_alocados)} (de {len(S)})\n")
+        print(f"Log '{NOME_LOG_SAIDA}' salvo com sucesso!")
+    except Exception as e:
+        print(f"Erro ao salvar Log TXT: {e}")
+
+    # --- 5. Salvar o modelo .lp ---
+    m.write(NOME_LP_MODELO)
+    print(f"\nModelo salvo em '{NOME_LP_MODELO}'")
+
+elif m.status == GRB.INFEASIBLE:
+    print("\nO modelo é inviável (INFEASIBLE).")
+    print("Computando IIS (Irreducible Inconsistent Subsystem) para depuração...")
+    m.computeIIS()
+    m.write(NOME_ILP_INVIAVEL)
+    print(f"Arquivo '{NOME_ILP_INVIAVEL}' escrito. Verifique este arquivo para ver as restrições conflitantes.")
+    # Importante: Sai com um código de erro para o 'run_all.py' saber que falhou
+    sys.exit(1)
+
+elif m.status == GRB.INF_OR_UNBD:
+    print("\nO modelo é inviável ou ilimitado (INF_OR_UNBD).")
+    sys.exit(1)
+
+else:
+    print(f"\nOtimização terminada com status: {m.status}")
+    sys.exit(1)
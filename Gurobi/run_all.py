@@ -14,8 +14,25 @@ import json
 # Para instâncias geradas: use os parâmetros normais (n_employees, n_shifts, ...)
 # Para instâncias estáticas: adicione a chave 'static_file': 'nome_do_arquivo.py'
 #
+# Montagem do modelo: chave opcional 'builder' (padrão BUILDER_PADRAO):
+#   'tupla'  -> new_model_big.py    (addVars/quicksum por linha)
+#   'matriz' -> new_model_matrix.py (addMVar + matrizes esparsas, em bloco;
+#               a instância gerada também é gravada em .nbi)
+#   'lex'    -> new_model_lex.py    (nível a nível, com MIP start e teto de
+#               tempo por nível; grava niveis_temp.csv)
+#
 # ==============================================================================
 
+BUILDERS = {
+    'tupla': 'new_model_big.py',
+    'matriz': 'new_model_matrix.py',
+    'lex': 'new_model_lex.py',
+}
+BUILDER_PADRAO = 'tupla'
+
+# Chaves do experimento que não são parâmetros do gerador.py
+CHAVES_NAO_GERADOR = ('id', 'static_file', 'builder')
+
 EXPERIMENTOS = [
     
     # --- INSTÂNCIA #1: A BASELINE DO ARTIGO (ESTÁTICA) ---
@@ -120,6 +137,20 @@ EXPERIMENTOS = [
         'n_employees': 250, 'n_shifts': 60,
         'n_skills': 8, 'max_skills': 5, 'min_skills': 2, 'max_unavailable': 1
     },
+
+    # --- GRUPO 6: ESCALA 1.000+ EMPREGADOS (API matricial) ---
+    {
+        'id': 'Grupo6_Escala_1000_2520',
+        'n_employees': 1000, 'n_shifts': 360,
+        'n_skills': 8, 'max_skills': 5, 'min_skills': 2, 'max_unavailable': 1,
+        'builder': 'matriz'
+    },
+    {
+        'id': 'Grupo6_Escala_2000_5040',
+        'n_employees': 2000, 'n_shifts': 720,
+        'n_skills': 8, 'max_skills': 5, 'min_skills': 2, 'max_unavailable': 1,
+        'builder': 'matriz'
+    },
 ]
 
 # ==============================================================================
@@ -132,6 +163,8 @@ def run_experiment(exp, log_file):
     Executa um único experimento (Gerar/Copiar, Resolver, Salvar).
     """
     instance_name = exp['id']
+    builder = exp.get('builder', BUILDER_PADRAO)
+    model_script = BUILDERS[builder]
     print("\n" + "="*80)
     print(f"--- INICIANDO EXPERIMENTO: {instance_name} ---")
     print(f"Parâmetros: {exp}")
@@ -139,7 +172,11 @@ def run_experiment(exp, log_file):
     log_file.flush()
 
     # --- Passo A: Gerar ou Copiar Instância ---
-    
+
+    # Um .nbi que sobrou de outro experimento teria prioridade sobre o .py
+    if os.path.exists('instancia_temp.nbi'):
+        os.remove('instancia_temp.nbi')
+
     if 'static_file' in exp:
         # --- Este é um experimento ESTÁTICO ---
         static_filename = exp['static_file']
@@ -166,9 +203,11 @@ def run_experiment(exp, log_file):
         print("Executando gerador.py...")
         cmd_generate = ["python", "gerador.py"]
         for param, value in exp.items():
-            if param != 'id':
+            if param not in CHAVES_NAO_GERADOR:
                 cmd_generate.append(f"--{param.replace('_', '-')}")
                 cmd_generate.append(str(value))
+        if builder == 'matriz':
+            cmd_generate.append("--bin")
         
         try:
             subprocess.run(cmd_generate, check=True, capture_output=True, text=True, encoding='utf-8')
@@ -229,7 +268,7 @@ def run_experiment(exp, log_file):
     #     pass
 
     # --- Passo B: Resolver o Modelo ---
-    print("Executando new_model_big.py (solver)...")
+    print(f"Executando {model_script} (solver, builder '{builder}')...")
     
     # Nomes dos arquivos de log temporários
     STDOUT_LOG_TEMP = "log_console_temp.txt"
@@ -245,7 +284,7 @@ def run_experiment(exp, log_file):
             
             # Executa o subprocesso, redirecionando o output
             result = subprocess.run(
-                ["python", "new_model_big.py"],
+                ["python", model_script],
                 check=True,       # Levanta um erro se o script falhar (exit code != 0)
                 text=True,        # Garante que o output é texto
                 timeout=timeout_segundos,
@@ -268,7 +307,7 @@ def run_experiment(exp, log_file):
         pass # Continua para a seção C (Arquivamento)
 
     except subprocess.CalledProcessError as e:
-        # O script new_model_big.py falhou (ex: Infeasible, que retorna sys.exit(1))
+        # O script do modelo falhou (ex: Infeasible, que retorna sys.exit(1))
         # Os logs (stdout/stderr) JÁ FORAM escritos, capturando o erro.
         print(f"ERRO: O Solver falhou (provavelmente Infeasible ou erro) para {instance_name}.")
         print(f"Veja '{STDERR_LOG_TEMP}' para detalhes (se houver).")
@@ -298,6 +337,8 @@ def run_experiment(exp, log_file):
     files_to_move = {
         # Arquivos padrão
         "instancia_temp.py": f"instancia_{instance_name}.py",
+        "instancia_temp.nbi": f"instancia_{instance_name}.nbi",
+        "niveis_temp.csv": f"niveis_{instance_name}.csv",
         "resultado_temp.json": f"resultado_{instance_name}.json",
         #"log_iteracoes.csv": f"log_iteracoes_{instance_name}.csv",
         
@@ -318,7 +359,7 @@ def run_experiment(exp, log_file):
                 shutil.move(temp_name, os.path.join(output_dir, final_name))
                 print(f"  - Arquivado: {final_name}")
             else:
-                if temp_name not in ["model.lp", "modelo_inviavel.ilp"]:
+                if temp_name not in ["model.lp", "modelo_inviavel.ilp", "instancia_temp.nbi", "niveis_temp.csv"]:
                     print(f"  - Aviso: Arquivo esperado '{temp_name}' não foi encontrado.")
         except Exception as e:
             print(f"ERRO ao mover {temp_name}: {e}")
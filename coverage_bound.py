@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Limite exato do nível 0 (turnos não alocados) por fluxo máximo.
+
+Rede (capacidades entre parênteses):
+
+    fonte -> empregado e (MxWk) -> (e, dia d) (1) -> ocorrência s (1) -> sumidouro (1)
+
+com arco (e, d) -> s só quando e é elegível para s (habilidade e
+disponibilidade) e d é o dia de s. O fluxo máximo é o maior número de
+ocorrências que podem ser cobertas respeitando MxWk e um turno por dia, logo
+min_uncovered = |S| - fluxo máximo.
+
+Para o GRASP (que impõe exatamente essas restrições) é o ótimo do nível 0.
+Os modelos MIP ainda têm as linhas de senioridade (6)/(7) e, em new_model.py,
+"pelo menos um turno" (3); para eles o valor é um limite inferior válido de
+sum_s u[s], e não necessariamente o ótimo.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional, TYPE_CHECKING
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import maximum_flow
+
+if TYPE_CHECKING:
+    from grasp_thompson_new3 import ThompsonInstance
+
+
+@dataclass
+class CoverageBound:
+    max_covered: int
+    min_uncovered: int
+    assign: np.ndarray      # ocorrência -> empregado numa cobertura ótima (-1 = livre)
+
+
+def coverage_bound(I: "ThompsonInstance", emp_mask: Optional[np.ndarray] = None,
+                   occ_mask: Optional[np.ndarray] = None) -> CoverageBound:
+    """
+    emp_mask / occ_mask (bool): restringe a rede aos empregados e ocorrências
+    marcados (ex.: os ainda não fixados em hojati.py); min_uncovered conta só
+    as ocorrências de occ_mask.
+    """
+    E, S, D = I.n_emp, I.n_occ, len(I.days)
+    # nós: fonte | empregados | (empregado, dia) | ocorrências | sumidouro
+    src = 0
+    emp0 = 1
+    ed0 = emp0 + E
+    occ0 = ed0 + E * D
+    sink = occ0 + S
+    n_nodes = sink + 1
+
+    emp = np.arange(E)
+    ed_e, ed_d = np.nonzero(I.avail_emp)
+    el_e, el_s = np.nonzero(I.elig)
+    occ = np.arange(S)
+    if emp_mask is not None:
+        emp = emp[emp_mask]
+        keep = emp_mask[ed_e]
+        ed_e, ed_d = ed_e[keep], ed_d[keep]
+        keep = emp_mask[el_e]
+        el_e, el_s = el_e[keep], el_s[keep]
+    if occ_mask is not None:
+        occ = occ[occ_mask]
+        keep = occ_mask[el_s]
+        el_e, el_s = el_e[keep], el_s[keep]
+
+    tails = np.concatenate([
+        np.full(len(emp), src),                   # fonte -> empregado
+        emp0 + ed_e,                              # empregado -> (empregado, dia)
+        ed0 + el_e * D + I.day_occ[el_s],         # (empregado, dia) -> ocorrência
+        occ0 + occ,                               # ocorrência -> sumidouro
+    ])
+    heads = np.concatenate([
+        emp0 + emp,
+        ed0 + ed_e * D + ed_d,
+        occ0 + el_s,
+        np.full(len(occ), sink),
+    ])
+    caps = np.concatenate([
+        I.cap_emp[emp].astype(np.int32),
+        np.ones(len(ed_e) + len(el_e) + len(occ), dtype=np.int32),
+    ])
+    G = csr_matrix((caps, (tails, heads)), shape=(n_nodes, n_nodes), dtype=np.int32)
+
+    res = maximum_flow(G, src, sink, method='dinic')
+
+    # cobertura ótima: arcos (empregado, dia) -> ocorrência com fluxo 1
+    F = res.flow.tocoo()
+    used = (F.data > 0) & (F.row >= ed0) & (F.row < occ0) & (F.col >= occ0) & (F.col < sink)
+    assign = np.full(S, -1, dtype=np.int64)
+    assign[F.col[used] - occ0] = (F.row[used] - ed0) // D
+
+    covered = int(res.flow_value)
+    return CoverageBound(max_covered=covered, min_uncovered=len(occ) - covered, assign=assign)
+
+
+def min_uncovered(I: "ThompsonInstance") -> int:
+    return coverage_bound(I).min_uncovered
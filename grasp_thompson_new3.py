@@ -1,13 +1,30 @@
 from __future__ import annotations
-import random, math, os, time, csv, importlib.util
-from dataclasses import dataclass
-from typing import Dict, Tuple, List, Set, Optional, NamedTuple
+import random, math, os, time, csv, json
+import multiprocessing as mp
+from bisect import bisect_left, bisect_right
+from array import array
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, Tuple, List, Set, Optional, NamedTuple, Iterable, Sequence, Callable, Union
+
+import numpy as np
+
+from instance_format import (InstanceTables, EXT as INSTANCE_EXT, tables_from_dicts,
+                             read_instance, load_instance_module)
+from precompute_cache import DerivedCache
+from coverage_bound import min_uncovered as coverage_min_uncovered
 
 EmpId = str
 Day = str
 ShiftId = int
 Occ = Tuple[Day, ShiftId]
 
+# Índices densos do núcleo inteiro: empregados 0..E-1 (ordem de senioridade)
+# e ocorrências 0..S-1 (ordem de I.S).
+EmpIdx = int
+OccIdx = int
+UNASSIGNED = -1
+
 # =========================
 # Instância
 # =========================
@@ -18,51 +35,290 @@ class ThompsonInstance:
     shift_requirements: Dict[Day, List[ShiftId]]
     LAMBDA_LUNCH: float = 0.0
     PENALTY_UNALLOC: float = 1_000_000.0  # p/ logs
+    # cache em disco de elegibilidade/custos/listas ordenadas (opcional)
+    cache: Optional[DerivedCache] = field(default=None, repr=False, compare=False)
+    # exige ao menos um turno elegível por empregado (o GRASP precisa; os
+    # modelos MIP aceitam empregado sem arcos, pois (3) fica desligada)
+    require_candidates: bool = field(default=True, repr=False, compare=False)
 
     def __post_init__(self):
-        self.days = ['Sun','Mon','Tue','Wed','Thu','Fri','Sat']
-        self.S: List[Occ] = [(d, sid) for d, ids in self.shift_requirements.items() for sid in ids]
-        self.ST_s  = {(d, sid): self.shift_data[sid]['ST'] for d, sid in self.S}
-        self.BL_s  = {(d, sid): self.shift_data[sid]['BL'] for d, sid in self.S}
-        self.TT_s  = {(d, sid): self.shift_data[sid]['TT'] for d, sid in self.S}
-        self.d_s   = {(d, sid): d for d, sid in self.S}
-
-        def emp_sort(e): return int(e.split('-')[1])
+        self._init_tables(tables_from_dicts(self.employee_data, self.shift_data, self.shift_requirements))
+
+    @classmethod
+    def from_tables(cls, tables: InstanceTables, LAMBDA_LUNCH: float = 0.0,
+                    PENALTY_UNALLOC: float = 1_000_000.0,
+                    cache: Optional[DerivedCache] = None,
+                    require_candidates: bool = True) -> "ThompsonInstance":
+        """
+        Monta a instância direto das tabelas em arrays (ex.: .nbi via mmap), sem
+        materializar employee_data/shift_data/shift_requirements (ficam None;
+        use I.tables.to_dicts() se precisar deles).
+        """
+        I = cls.__new__(cls)
+        I.employee_data = I.shift_data = I.shift_requirements = None
+        I.LAMBDA_LUNCH = LAMBDA_LUNCH
+        I.PENALTY_UNALLOC = PENALTY_UNALLOC
+        I.cache = cache
+        I.require_candidates = require_candidates
+        I._init_tables(tables)
+        return I
+
+    def _init_tables(self, tables: InstanceTables) -> None:
+        self.tables = tables
+        self.days = list(tables.days)
         # E = [E-01, E-02, ...] em ordem de senioridade (E-01 mais sênior)
-        self.E: List[EmpId] = sorted(self.employee_data.keys(), key=emp_sort)
-
-        self.ST_e = {e: v['ST'] for e, v in self.employee_data.items()}
-        self.LL_e = {e: v['LL'] for e, v in self.employee_data.items()}
-        self.ES_e = {e: v['ES'] for e, v in self.employee_data.items()}
-        self.LS_e = {e: v['LS'] for e, v in self.employee_data.items()}
-        self.Ce_e = {e: set(v['SklTyp']) for e, v in self.employee_data.items()}
-        self.m_e  = {e: v['MxWk'] for e, v in self.employee_data.items()}
-        self.Un_e = {e: set(v['UnDay']) for e, v in self.employee_data.items()}
-        self.De_e = {e: set(self.days) - self.Un_e[e] for e in self.E}
-
-        # elegibilidade + custo individual
-        self.ES: Set[Tuple[EmpId, Occ]] = set()
-        self.v_es: Dict[Tuple[EmpId, Occ], float] = {}
-        for e in self.E:
-            for s in self.S:
-                if (self.TT_s[s] in self.Ce_e[e]) and (self.d_s[s] in self.De_e[e]):
-                    self.ES.add((e, s))
-                    self.v_es[(e, s)] = self._diss(e, s)
-
-        infeas = [e for e in self.E if all((e, s) not in self.ES for s in self.S)]
-        if infeas:
+        self.E: List[EmpId] = list(tables.emp_ids)
+        self.S: List[Occ] = list(zip([self.days[d] for d in tables.req_day.tolist()],
+                                     tables.shift_ids[tables.req_tpl].tolist()))
+
+        self._build_core()
+
+        if self.require_candidates and not self.elig.any(axis=1).all():
+            infeas = [self.E[i] for i in np.flatnonzero(~self.elig.any(axis=1))]
             raise ValueError(f"Instância inviável: sem candidatos para {infeas}")
 
+    # Atributos por ocorrência/empregado com chave tupla/string (visões)
+    @cached_property
+    def ST_s(self) -> Dict[Occ, float]:
+        return dict(zip(self.S, self.tables.shift_st[self.tables.req_tpl].tolist()))
+
+    @cached_property
+    def BL_s(self) -> Dict[Occ, float]:
+        return dict(zip(self.S, self.tables.shift_bl[self.tables.req_tpl].tolist()))
+
+    @cached_property
+    def TT_s(self) -> Dict[Occ, int]:
+        return dict(zip(self.S, self.tt_occ.tolist()))
+
+    @cached_property
+    def d_s(self) -> Dict[Occ, Day]:
+        return {s: s[0] for s in self.S}
+
+    @cached_property
+    def ST_e(self) -> Dict[EmpId, float]:
+        return dict(zip(self.E, self.tables.emp_st.tolist()))
+
+    @cached_property
+    def LL_e(self) -> Dict[EmpId, float]:
+        return dict(zip(self.E, self.tables.emp_ll.tolist()))
+
+    @cached_property
+    def ES_e(self) -> Dict[EmpId, float]:
+        return dict(zip(self.E, self.tables.emp_es.tolist()))
+
+    @cached_property
+    def LS_e(self) -> Dict[EmpId, float]:
+        return dict(zip(self.E, self.tables.emp_ls.tolist()))
+
+    @cached_property
+    def Ce_e(self) -> Dict[EmpId, Set[int]]:
+        ptr, sk = self.tables.emp_skill_ptr.tolist(), self.tables.emp_skill.tolist()
+        return {e: set(sk[ptr[i]:ptr[i + 1]]) for i, e in enumerate(self.E)}
+
+    @cached_property
+    def m_e(self) -> Dict[EmpId, int]:
+        return dict(zip(self.E, self.cap))
+
+    @cached_property
+    def De_e(self) -> Dict[EmpId, Set[Day]]:
+        return {e: {d for j, d in enumerate(self.days) if row[j]}
+                for e, row in zip(self.E, self.avail_emp.tolist())}
+
+    @cached_property
+    def Un_e(self) -> Dict[EmpId, Set[Day]]:
+        return {e: set(self.days) - self.De_e[e] for e in self.E}
+
+    @cached_property
+    def emp_idx(self) -> Dict[EmpId, EmpIdx]:
+        return {e: i for i, e in enumerate(self.E)}
+
+    @cached_property
+    def occ_idx(self) -> Dict[Occ, OccIdx]:
+        return {s: k for k, s in enumerate(self.S)}
+
+    # Visões por string/tupla (relatórios e scripts antigos), montadas sob demanda
+    @cached_property
+    def ES(self) -> Set[Tuple[EmpId, Occ]]:
+        return set(self.v_es)
+
+    @cached_property
+    def v_es(self) -> Dict[Tuple[EmpId, Occ], float]:
+        E, S = self.E, self.S
+        return {(E[i], S[k]): v for i, row in enumerate(self.cost) for k, v in row.items()}
+
+    @cached_property
+    def eligible_sorted(self) -> Dict[EmpId, List[Occ]]:
+        return {e: [self.S[k] for k in self.order[i]] for i, e in enumerate(self.E)}
+
+    # Listas de adjacência dos arcos elegíveis, para montar modelos linha a
+    # linha sem varrer E×S (cada linha percorre só os seus arcos)
+    @cached_property
+    def eligible_by_occ(self) -> Dict[Occ, List[EmpId]]:
+        """Empregados elegíveis para cada ocorrência, em ordem de senioridade."""
+        E, S = self.E, self.S
+        adj: Dict[Occ, List[EmpId]] = {s: [] for s in S}
+        ks, iz = np.nonzero(self.elig.T)
+        for k, i in zip(ks.tolist(), iz.tolist()):
+            adj[S[k]].append(E[i])
+        return adj
+
+    @cached_property
+    def eligible_by_emp_day(self) -> Dict[Tuple[EmpId, Day], List[Occ]]:
+        """Ocorrências elegíveis de cada empregado em cada dia disponível."""
+        E, S, days = self.E, self.S, self.days
+        ie, de = np.nonzero(self.avail_emp)
+        adj: Dict[Tuple[EmpId, Day], List[Occ]] = {
+            (E[i], days[d]): [] for i, d in zip(ie.tolist(), de.tolist())
+        }
+        iz, ks = np.nonzero(self.elig)
+        day_occ = self.day_occ.tolist()
+        for i, k in zip(iz.tolist(), ks.tolist()):
+            adj[E[i], days[day_occ[k]]].append(S[k])
+        return adj
+
+    def _build_core(self) -> None:
+        """
+        Núcleo compacto: empregados e ocorrências viram inteiros densos e os
+        atributos ficam em arrays NumPy. O laço quente (construção e busca
+        local) só usa este núcleo; as estruturas por tupla acima são visões.
+        """
+        T = self.tables
+        self.n_emp, self.n_occ = T.n_emp, T.n_occ
+
+        self.day_occ = np.asarray(T.req_day, dtype=np.int8)
+        self.st_occ  = T.shift_st[T.req_tpl].astype(np.float64)
+        self.bl_occ  = T.shift_bl[T.req_tpl].astype(np.float64)
+        self.tt_occ  = T.shift_tt[T.req_tpl].astype(np.int64)
+
+        self.st_emp  = T.emp_st.astype(np.float64)
+        self.ll_emp  = T.emp_ll.astype(np.float64)
+        self.es_emp  = T.emp_es.astype(np.float64)
+        self.ls_emp  = T.emp_ls.astype(np.float64)
+        self.cap_emp = T.emp_cap.astype(np.int32)
+        self.avail_emp = ((T.emp_unav[:, None] >> np.arange(len(self.days))) & 1) == 0
+
+        # Habilidades recodificadas em 0..K-1 (colunas de skill_emp / bits de skill_mask)
+        self.skills = np.union1d(self.tt_occ, T.emp_skill)
+        self.tt_code = np.searchsorted(self.skills, self.tt_occ)
+        self.emp_skill_code = np.searchsorted(self.skills, T.emp_skill)
+
+        # Dados derivados (elegibilidade, custos, listas ordenadas): do cache
+        # em disco quando disponível, senão calculados e gravados nele.
+        key = self.cache.key(T, self.LAMBDA_LUNCH) if self.cache is not None else None
+        derived = self.cache.load(key) if key is not None else None
+        if derived is not None:
+            self._load_derived(derived)
+        else:
+            self._compute_derived()
+            if key is not None:
+                self.cache.store(key, self._export_derived())
+
+    def _compute_derived(self) -> None:
+        T = self.tables
+        # Habilidades como colunas: skill_emp[i, c] = empregado i tem a habilidade c
+        skill_emp = np.zeros((self.n_emp, len(self.skills)), dtype=bool)
+        rows = np.repeat(np.arange(self.n_emp), np.diff(T.emp_skill_ptr))
+        skill_emp[rows, self.emp_skill_code] = True
+
+        # elegibilidade: (TT_s ∈ Ce_e) e (d_s ∈ De_e), por broadcasting E x S
+        self.elig = skill_emp[:, self.tt_code] & self.avail_emp[:, self.day_occ]
+
+        # custo individual: ES*(ST_e-ST_s) se adiantado, LS*(ST_s-ST_e) se atrasado,
+        # + LAMBDA_LUNCH*|BL_s-LL_e|; inf = inelegível
+        diff = self.st_emp[:, None] - self.st_occ[None, :]
+        base = np.where(diff > 0, self.es_emp[:, None] * diff, self.ls_emp[:, None] * -diff)
+        lunch = self.LAMBDA_LUNCH * np.abs(self.bl_occ[None, :] - self.ll_emp[:, None])
+        self.V = np.where(self.elig, base + lunch, np.inf)
+
         # >>> Otimização: listas elegíveis pré-ordenadas por g(s)=d_ies
-        self.eligible_sorted: Dict[EmpId, List[Occ]] = {
-            e: sorted([s for s in self.S if (e, s) in self.ES], key=lambda s: self.v_es[(e, s)])
-            for e in self.E
+        # (argsort estável por linha: empate mantém a ordem de I.S; inelegíveis no fim)
+        # Resultado em formato CSR: order_occ[order_ptr[i]:order_ptr[i+1]].
+        n_elig = self.elig.sum(axis=1)
+        ranked = np.argsort(self.V, axis=1, kind='stable')
+        self.order_ptr = np.concatenate(([0], np.cumsum(n_elig)))
+        self.order_occ = ranked[np.arange(self.n_occ)[None, :] < n_elig[:, None]]
+
+    def _export_derived(self) -> Dict[str, np.ndarray]:
+        rows = np.repeat(np.arange(self.n_emp), np.diff(self.order_ptr))
+        return {
+            'order_ptr': self.order_ptr,
+            'order_occ': self.order_occ,
+            'order_cost': self.V[rows, self.order_occ],
         }
 
-    def _diss(self, e: EmpId, s: Occ) -> float:
-        ste, sts = self.ST_e[e], self.ST_s[s]
-        base = self.ES_e[e]*(ste-sts) if sts < ste else self.LS_e[e]*(sts - ste)
-        return float(base + self.LAMBDA_LUNCH * abs(self.BL_s[s] - self.LL_e[e]))
+    def _load_derived(self, d: Dict[str, np.ndarray]) -> None:
+        self.order_ptr, self.order_occ = d['order_ptr'], d['order_occ']
+        rows = np.repeat(np.arange(self.n_emp), np.diff(self.order_ptr))
+        self.elig = np.zeros((self.n_emp, self.n_occ), dtype=bool)
+        self.elig[rows, self.order_occ] = True
+        self.V = np.full((self.n_emp, self.n_occ), np.inf)
+        self.V[rows, self.order_occ] = d['order_cost']
+
+    # Cópias em listas Python para acesso escalar no laço quente
+    # (indexar np.ndarray elemento a elemento é mais lento que list/dict).
+    @cached_property
+    def cap(self) -> List[int]:
+        return self.cap_emp.tolist()
+
+    @cached_property
+    def slot_base(self) -> List[int]:
+        # início do bloco de MxWk vagas de cada empregado em ThompsonSolution.slots
+        return np.concatenate(([0], np.cumsum(self.cap_emp, dtype=np.int64))).tolist()
+
+    @cached_property
+    def day(self) -> List[int]:
+        return self.day_occ.tolist()
+
+    # Conjuntos como bitmasks (int): bit d = dia d, bit c = habilidade de código c.
+    # Elegibilidade de (e, s) = skill_mask[e] & tt_bit[s] e avail_mask[e] & day_bit[s].
+    @cached_property
+    def day_bit(self) -> List[int]:
+        return [1 << d for d in self.day]
+
+    @cached_property
+    def tt_bit(self) -> List[int]:
+        return [1 << c for c in self.tt_code.tolist()]
+
+    @cached_property
+    def skill_mask(self) -> List[int]:
+        ptr, codes = self.tables.emp_skill_ptr.tolist(), self.emp_skill_code.tolist()
+        masks = []
+        for i in range(self.n_emp):
+            m = 0
+            for c in codes[ptr[i]:ptr[i + 1]]:
+                m |= 1 << c
+            masks.append(m)
+        return masks
+
+    @cached_property
+    def avail_mask(self) -> List[int]:
+        weights = 1 << np.arange(len(self.days), dtype=np.int64)
+        return (self.avail_emp.astype(np.int64) @ weights).tolist()
+
+    @cached_property
+    def order(self) -> List[List[OccIdx]]:
+        occ, ptr = self.order_occ.tolist(), self.order_ptr.tolist()
+        return [occ[ptr[i]:ptr[i + 1]] for i in range(self.n_emp)]
+
+    @cached_property
+    def order_costs(self) -> List[List[float]]:
+        # custos alinhados a order[e] (não decrescentes): permite bisect no limiar da RCL
+        return [self.V[i, ks].tolist() for i, ks in enumerate(self.order)]
+
+    @cached_property
+    def occ_emps(self) -> List[List[EmpIdx]]:
+        """
+        Índice reverso: empregados elegíveis (habilidade e dia) para cada ocorrência,
+        por custo crescente; empate -> mais júnior primeiro.
+        """
+        junior_first = np.broadcast_to(-np.arange(self.n_emp), (self.n_occ, self.n_emp))
+        ranked = np.lexsort((junior_first, self.V.T), axis=-1)
+        n_elig = self.elig.sum(axis=0)
+        return [r[:n].tolist() for r, n in zip(ranked, n_elig.tolist())]
+
+    @cached_property
+    def cost(self) -> List[Dict[OccIdx, float]]:
+        return [dict(zip(ks, self.V[i, ks].tolist())) for i, ks in enumerate(self.order)]
 
 # =========================
 # Custo lexicográfico (p/ comparar iterações)
@@ -72,136 +328,449 @@ class LexCost(NamedTuple):
     report_value: float
 
 def lex_cost(I: ThompsonInstance, sol: "ThompsonSolution") -> LexCost:
+    # lê o vetor de insatisfação mantido pelas operações in-place
     n_unalloc = len(sol.unassigned)
-    diss = {e: 0.0 for e in I.E}
-    for e, shifts in sol.by_emp.items():
-        for s in shifts:
-            diss[e] += I.v_es[(e, s)]
-    comp = (float(n_unalloc),) + tuple(diss[e] for e in I.E)
-    report = n_unalloc*I.PENALTY_UNALLOC + sum(diss.values())
-    return LexCost(comp, report)
+    comp = (float(n_unalloc),) + tuple(sol.diss)
+    return LexCost(comp, report_value(I, sol))
+
+def report_value(I: ThompsonInstance, sol: "ThompsonSolution") -> float:
+    return len(sol.unassigned)*I.PENALTY_UNALLOC + sum(sol.diss)
 
 def lex_better(a: LexCost, b: LexCost) -> bool:
     return a.comp < b.comp
 
+# --- Comparação direta sobre os vetores correntes (sem montar tuplas) ---
+def lex_first_diff(a: Sequence[float], b: Sequence[float]) -> int:
+    """
+    Primeira posição em que os vetores a e b (list, array('d') ou np.ndarray)
+    diferem, ou -1 se forem iguais. Para diagnóstico.
+    """
+    for k, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            return k
+    return -1 if len(a) == len(b) else min(len(a), len(b))
+
+def lex_vec_better(a: Sequence[float], b: Sequence[float]) -> bool:
+    k = lex_first_diff(a, b)
+    return k >= 0 and (k == len(a) or (k < len(b) and a[k] < b[k]))
+
+def sol_first_diff_level(a: "ThompsonSolution", b: "ThompsonSolution") -> int:
+    """Nível lexicográfico (0 = não alocados, e+1 = empregado e) da primeira diferença, ou -1."""
+    if len(a.unassigned) != len(b.unassigned):
+        return 0
+    k = lex_first_diff(a.diss, b.diss)
+    return k + 1 if k >= 0 else -1
+
+def sol_lex_better(a: "ThompsonSolution", b: "ThompsonSolution") -> bool:
+    na, nb = len(a.unassigned), len(b.unassigned)
+    if na != nb:
+        return na < nb
+    # comparação de array('d') é feita em C e para no primeiro nível diferente
+    return a.diss < b.diss
+
+def lex_delta_improves(changes: Iterable[Tuple[int, float]]) -> bool:
+    """
+    Diz se um movimento melhora o objetivo lexicográfico sem aplicá-lo.
+    changes: pares (nível, variação); nível 0 = turnos não alocados,
+    nível e+1 = insatisfação do empregado e. Decide o nível mais prioritário
+    com variação não nula.
+    """
+    for _, d in sorted(changes):
+        if d != 0.0:
+            return d < 0.0
+    return False
+
 # =========================
 # Solução (mutável) + operações in-place
+# (tudo indexado pelo núcleo inteiro: e em 0..E-1, s em 0..S-1)
 # =========================
 @dataclass
 class ThompsonSolution:
-    assign: Dict[Occ, Optional[EmpId]]
-    load: Dict[EmpId, int]
-    used_day: Dict[Tuple[EmpId, Day], bool]
-    by_emp: Dict[EmpId, List[Occ]]
-    unassigned: Set[Occ]
+    assign: array                   # 'i': ocorrência -> empregado (UNASSIGNED = livre)
+    load: array                     # 'i': turnos por empregado
+    used_day: array                 # 'B': bitmask de 7 bits dos dias ocupados de cada empregado
+    # Turnos de cada empregado em vagas de capacidade fixa: o empregado e usa
+    # slots[slot_base[e] : slot_base[e] + load[e]]; vagas livres = UNASSIGNED.
+    # pos[s] é a vaga ocupada por s (-1 se livre), o que torna add/remove/swap O(1).
+    slots: array                    # 'i'
+    pos: array                      # 'i'
+    # Insatisfação corrente de cada empregado (soma exata dos custos dos seus
+    # turnos); len(unassigned) é o contador do nível 0.
+    diss: array                     # 'd'
+    unassigned: Set[OccIdx]
 
 def empty_solution(I: ThompsonInstance) -> ThompsonSolution:
-    assign = {s: None for s in I.S}
-    load = {e: 0 for e in I.E}
-    used_day = {(e, d): False for e in I.E for d in I.days}
-    by_emp = {e: [] for e in I.E}
-    unassigned = set(I.S)
-    return ThompsonSolution(assign, load, used_day, by_emp, unassigned)
-
-def can_assign(I: ThompsonInstance, sol: ThompsonSolution, e: EmpId, s: Occ) -> bool:
-    if sol.assign[s] is not None: return False
-    if sol.load[e] >= I.m_e[e]: return False
-    if sol.used_day[(e, I.d_s[s])]: return False
-    return (e, s) in I.ES
-
-def assign_inplace(I: ThompsonInstance, sol: ThompsonSolution, e: EmpId, s: Occ) -> None:
+    assign = array('i', [UNASSIGNED]) * I.n_occ
+    load = array('i', [0]) * I.n_emp
+    used_day = array('B', [0]) * I.n_emp
+    slots = array('i', [UNASSIGNED]) * I.slot_base[-1]
+    pos = array('i', [-1]) * I.n_occ
+    diss = array('d', [0.0]) * I.n_emp
+    unassigned = set(range(I.n_occ))
+    return ThompsonSolution(assign, load, used_day, slots, pos, diss, unassigned)
+
+def solution_from_assign(I: ThompsonInstance, assign: Sequence[int]) -> ThompsonSolution:
+    """Reconstrói a solução (vagas, dias, insatisfação) a partir de ocorrência -> empregado."""
+    sol = empty_solution(I)
+    for s, e in enumerate(assign):
+        if e != UNASSIGNED:
+            assign_inplace(I, sol, e, s)
+    return sol
+
+def shifts_of(I: ThompsonInstance, sol: ThompsonSolution, e: EmpIdx) -> array:
+    base = I.slot_base[e]
+    return sol.slots[base:base + sol.load[e]]
+
+def _refresh_diss(I: ThompsonInstance, sol: ThompsonSolution, e: EmpIdx) -> None:
+    # no máximo MxWk parcelas; fsum independe da ordem das vagas, então
+    # conjuntos iguais de turnos sempre dão o mesmo valor (sem deriva de +=/-=)
+    cost_e = I.cost[e]
+    sol.diss[e] = math.fsum([cost_e[s] for s in shifts_of(I, sol, e)])
+
+def can_assign(I: ThompsonInstance, sol: ThompsonSolution, e: EmpIdx, s: OccIdx) -> bool:
+    if sol.assign[s] != UNASSIGNED: return False
+    if sol.load[e] >= I.cap[e]: return False
+    bit = I.day_bit[s]
+    if sol.used_day[e] & bit: return False
+    return bool(I.skill_mask[e] & I.tt_bit[s]) and bool(I.avail_mask[e] & bit)
+
+def assign_inplace(I: ThompsonInstance, sol: ThompsonSolution, e: EmpIdx, s: OccIdx) -> None:
     sol.assign[s] = e
+    sol.used_day[e] |= I.day_bit[s]
+    p = I.slot_base[e] + sol.load[e]
+    sol.slots[p] = s
+    sol.pos[s] = p
     sol.load[e] += 1
-    d = I.d_s[s]
-    sol.used_day[(e, d)] = True
-    sol.by_emp[e].append(s)
+    _refresh_diss(I, sol, e)
     sol.unassigned.discard(s)
 
-def can_swap(I: ThompsonInstance, sol: ThompsonSolution, s1: Occ, s2: Occ) -> bool:
+def unassign_inplace(I: ThompsonInstance, sol: ThompsonSolution, s: OccIdx) -> None:
+    e = sol.assign[s]
+    sol.assign[s] = UNASSIGNED
+    sol.used_day[e] &= ~I.day_bit[s]
+    # remove por troca com a última vaga ocupada do empregado
+    p, last = sol.pos[s], I.slot_base[e] + sol.load[e] - 1
+    t = sol.slots[last]
+    sol.slots[p] = t
+    sol.pos[t] = p
+    sol.slots[last] = UNASSIGNED
+    sol.pos[s] = -1
+    sol.load[e] -= 1
+    _refresh_diss(I, sol, e)
+    sol.unassigned.add(s)
+
+def can_swap(I: ThompsonInstance, sol: ThompsonSolution, s1: OccIdx, s2: OccIdx) -> bool:
     if s1 == s2: return False
     e1, e2 = sol.assign[s1], sol.assign[s2]
-    if (e1 is None) or (e2 is None) or (e1 == e2): return False
-    if (e1, s2) not in I.ES or (e2, s1) not in I.ES: return False
-    d1, d2 = I.d_s[s1], I.d_s[s2]
-    if d1 != d2 and (sol.used_day[(e1, d2)] or sol.used_day[(e2, d1)]): return False
+    if (e1 == UNASSIGNED) or (e2 == UNASSIGNED) or (e1 == e2): return False
+    b1, b2 = I.day_bit[s1], I.day_bit[s2]
+    if not (I.skill_mask[e1] & I.tt_bit[s2] and I.avail_mask[e1] & b2): return False
+    if not (I.skill_mask[e2] & I.tt_bit[s1] and I.avail_mask[e2] & b1): return False
+    if b1 != b2 and (sol.used_day[e1] & b2 or sol.used_day[e2] & b1): return False
     return True
 
-def swap_inplace(I: ThompsonInstance, sol: ThompsonSolution, s1: Occ, s2: Occ) -> None:
+def swap_inplace(I: ThompsonInstance, sol: ThompsonSolution, s1: OccIdx, s2: OccIdx) -> None:
     e1, e2 = sol.assign[s1], sol.assign[s2]
-    d1, d2 = I.d_s[s1], I.d_s[s2]
-    sol.used_day[(e1, d1)] = False; sol.used_day[(e2, d2)] = False
-    sol.used_day[(e2, d1)] = True;  sol.used_day[(e1, d2)] = True
+    b1, b2 = I.day_bit[s1], I.day_bit[s2]
+    if b1 != b2:
+        # e1 troca o dia de s1 pelo de s2 e e2 o contrário (ambos livres no outro dia)
+        sol.used_day[e1] ^= b1 | b2
+        sol.used_day[e2] ^= b1 | b2
     sol.assign[s1], sol.assign[s2] = e2, e1
-    sol.by_emp[e1].remove(s1); sol.by_emp[e1].append(s2)
-    sol.by_emp[e2].remove(s2); sol.by_emp[e2].append(s1)
+    p1, p2 = sol.pos[s1], sol.pos[s2]
+    sol.slots[p1], sol.slots[p2] = s2, s1
+    sol.pos[s1], sol.pos[s2] = p2, p1
+    _refresh_diss(I, sol, e1)
+    _refresh_diss(I, sol, e2)
+
+# =========================
+# Avaliação incremental (delta) de movimentos, sem aplicá-los
+# =========================
+def assign_improves(I: ThompsonInstance, sol: ThompsonSolution, e: EmpIdx, s: OccIdx) -> bool:
+    # cobrir um turno livre reduz o nível 0, que domina todos os demais
+    return sol.assign[s] == UNASSIGNED
+
+def swap_improves(I: ThompsonInstance, sol: ThompsonSolution, s1: OccIdx, s2: OccIdx) -> bool:
+    e1, e2 = sol.assign[s1], sol.assign[s2]
+    c1, c2 = I.cost[e1], I.cost[e2]
+    return lex_delta_improves(((e1 + 1, c1[s2] - c1[s1]), (e2 + 1, c2[s1] - c2[s2])))
+
+def relocate_improves(I: ThompsonInstance, sol: ThompsonSolution, s: OccIdx, e_new: EmpIdx) -> bool:
+    """Mover s (já alocado) do empregado atual para e_new."""
+    e_old = sol.assign[s]
+    return lex_delta_improves(((e_old + 1, -I.cost[e_old][s]), (e_new + 1, I.cost[e_new][s])))
+
+def solution_by_emp(I: ThompsonInstance, sol: ThompsonSolution) -> Dict[EmpId, List[Occ]]:
+    """Visão por string/tupla das alocações (para relatórios)."""
+    return {e: [I.S[s] for s in shifts_of(I, sol, i)] for i, e in enumerate(I.E)}
+
+# =========================
+# Orçamento de tempo (relógio monotônico)
+# =========================
+class TimeBudget:
+    """
+    Prazos de uma execução em time.perf_counter() (monotônico).
+
+    total: segundos da execução inteira (None = sem prazo global).
+    quotas: limite (s) de cada chamada de uma fase: 'construction',
+    'local_search', 'path_relinking'. O prazo de uma chamada é o menor entre
+    o global e o início da chamada + cota da fase.
+
+    Os prazos são consultados dentro de Constructor.build e LocalSearch.improve
+    (e das vizinhanças), não só entre iterações: uma iteração lenta não
+    ultrapassa o prazo global por mais que um passo elementar.
+    """
+    def __init__(self, total: Optional[float] = None,
+                 quotas: Optional[Dict[str, Optional[float]]] = None):
+        self.start = time.perf_counter()
+        self.deadline = math.inf if total is None else self.start + total
+        self.quotas = {k: v for k, v in (quotas or {}).items() if v is not None}
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.perf_counter())
+
+    def expired(self) -> bool:
+        return time.perf_counter() >= self.deadline
+
+    def phase_deadline(self, phase: str) -> float:
+        q = self.quotas.get(phase)
+        return self.deadline if q is None else min(self.deadline, time.perf_counter() + q)
+
+# =========================
+# Instrumentação: tempos e contadores por fase
+# =========================
+class Profiler:
+    """
+    Tempos (s) e contadores de uma execução do GRASP, por fase.
+
+    Tempos: 'construction', 'repair', 'ls.<vizinhança>', 'path_relinking',
+    'evaluation' (comparação com o incumbente e atualização do α reativo).
+    Contadores: 'construction.candidates' (tamanho somado das RCLs),
+    'repair.assigned', 'ls.<vizinhança>.calls' / '.accepted' / '.tried'
+    (pares ou movimentos avaliados) / '.cutoff' (parou em max_pairs/max_tries),
+    'ls.ejection_chain.nodes'.
+
+    Os valores de cada iteração ficam em buffers até end_iteration, que os
+    soma aos totais e, com jsonl_path, grava uma linha JSON por iteração
+    (o arquivo é recriado a cada Profiler). Sem profiler, Constructor e
+    LocalSearch não medem nada.
+    """
+    def __init__(self, jsonl_path: Optional[str] = None):
+        self.jsonl_path = jsonl_path
+        self.iterations = 0
+        self.times: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self._it_times: Dict[str, float] = {}
+        self._it_counts: Dict[str, int] = {}
+        if jsonl_path:
+            d = os.path.dirname(os.path.abspath(jsonl_path))
+            os.makedirs(d, exist_ok=True)
+            open(jsonl_path, 'w').close()
+
+    def add_time(self, key: str, dt: float) -> None:
+        self._it_times[key] = self._it_times.get(key, 0.0) + dt
+
+    def count(self, key: str, n: int = 1) -> None:
+        self._it_counts[key] = self._it_counts.get(key, 0) + n
+
+    def take_iteration(self) -> Tuple[Dict[str, float], Dict[str, int]]:
+        """Devolve e zera os buffers da iteração corrente."""
+        out = self._it_times, self._it_counts
+        self._it_times, self._it_counts = {}, {}
+        return out
+
+    def end_iteration(self, it: int, times: Optional[Dict[str, float]] = None,
+                      counts: Optional[Dict[str, int]] = None, **info) -> None:
+        """
+        Fecha a iteração it. times/counts vêm de outro processo (modo
+        paralelo); sem eles, usa os buffers deste profiler.
+        """
+        if times is None and counts is None:
+            times, counts = self.take_iteration()
+        times, counts = times or {}, counts or {}
+        self.iterations += 1
+        for k, v in times.items():
+            self.times[k] = self.times.get(k, 0.0) + v
+        for k, v in counts.items():
+            self.counts[k] = self.counts.get(k, 0) + v
+        self._write({'iter': it, **info, 'times': times, 'counts': counts})
+
+    def end_run(self, **info) -> None:
+        self._write({'summary': self.as_dict(), **info})
+
+    def as_dict(self) -> Dict[str, object]:
+        return {'iterations': self.iterations, 'times': dict(self.times), 'counts': dict(self.counts)}
+
+    def _write(self, record: Dict[str, object]) -> None:
+        if self.jsonl_path:
+            with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + '\n')
 
 # =========================
 # Construção – Fase 1 (com RCL de limiar)
 # =========================
 class Constructor:
-    def __init__(self, I: ThompsonInstance):
+    def __init__(self, I: ThompsonInstance, profiler: Optional[Profiler] = None):
         self.I = I
+        self.profiler = profiler
 
-    def _meta_turnos(self, e: EmpId, rank: int) -> int:
-        return self.I.m_e[e]
+    def _meta_turnos(self, e: EmpIdx, rank: int) -> int:
+        return self.I.cap[e]
 
     def build(self, alpha: float, rng: random.Random,
-              strategy: str = 'traditional', random_p: float = 0.25) -> ThompsonSolution:
+              strategy: str = 'traditional', random_p: float = 0.25,
+              deadline: Optional[float] = None) -> ThompsonSolution:
+        """
+        deadline: instante (time.perf_counter()) em que a construção para; o
+        que faltar fica livre (a solução continua viável).
+        """
         I = self.I
+        prof = self.profiler
+        t0 = time.perf_counter() if prof is not None else 0.0
+        n_cand = 0
         sol = empty_solution(I)
+        deadline = math.inf if deadline is None else deadline
 
-        for rank, e in enumerate(I.E):
-            target = self._meta_turnos(e, rank)
+        day_bit = I.day_bit
+        unassigned = sol.unassigned
+        for e in range(I.n_emp):
+            if time.perf_counter() >= deadline:
+                break
+            target = self._meta_turnos(e, e)
+            occ_e, costs_e = I.order[e], I.order_costs[e]
+            # Cursores na lista ordenada: candidatos vivos ficam em occ_e[lo:hi].
+            # Um turno consumido (alocado ou em dia já ocupado por e) não volta a
+            # ser candidato durante a construção, então os cursores só avançam.
+            lo, hi = 0, len(occ_e)
             while sol.load[e] < target:
-                C = [
-                    s for s in I.eligible_sorted[e]
-                    if (s in sol.unassigned) and (not sol.used_day[(e, I.d_s[s])])
-                ]
-                if not C:
+                used_e = sol.used_day[e]
+                while lo < hi and (occ_e[lo] not in unassigned or used_e & day_bit[occ_e[lo]]):
+                    lo += 1
+                while hi > lo and (occ_e[hi - 1] not in unassigned or used_e & day_bit[occ_e[hi - 1]]):
+                    hi -= 1
+                if lo == hi:
                     break
 
                 if strategy == 'random_plus_greedy' and rng.random() < random_p:
+                    C = [s for s in occ_e[lo:hi] if s in unassigned and not (used_e & day_bit[s])]
+                    n_cand += len(C)
                     assign_inplace(I, sol, e, rng.choice(C))
                     continue
 
-                gmin = I.v_es[(e, C[0])]
-                gmax = I.v_es[(e, C[-1])]
+                gmin = costs_e[lo]
+                gmax = costs_e[hi - 1]
                 thr  = gmin + alpha * (gmax - gmin)
 
-                RCL: List[Occ] = []
-                for s in C:
-                    v = I.v_es[(e, s)]
-                    if v <= thr:
-                        RCL.append(s)
-                    else:
-                        break
+                # RCL = candidatos vivos com custo <= thr: só a janela [lo, k) é filtrada
+                k = bisect_right(costs_e, thr, lo, hi)
+                RCL = [s for s in occ_e[lo:k] if s in unassigned and not (used_e & day_bit[s])]
+                n_cand += len(RCL)
 
                 assign_inplace(I, sol, e, rng.choice(RCL))
 
-        max_passes = 3
-        for _ in range(max_passes):
+        # Reparo: cada turno livre vai para o candidato elegível de menor custo
+        # com capacidade e dia livres. occ_emps já está nessa ordem, então o
+        # primeiro viável é o escolhido. Repete até o ponto fixo.
+        if prof is not None:
+            t1 = time.perf_counter()
+            prof.add_time('construction', t1 - t0)
+            prof.count('construction.candidates', n_cand)
+        cap, load, used_day = I.cap, sol.load, sol.used_day
+        n_rep = 0
+        changed = True
+        while changed and time.perf_counter() < deadline:
             changed = False
-            for s in list(sol.unassigned):
-                cand_es = [e for e in reversed(I.E) if can_assign(I, sol, e, s)]
-                if not cand_es:
-                    continue
-                best_e = min(cand_es, key=lambda e: I.v_es[(e, s)])
-                assign_inplace(I, sol, best_e, s)
-                changed = True
-            if not changed:
-                break
+            for s in list(unassigned):
+                bit = day_bit[s]
+                for e in I.occ_emps[s]:
+                    if load[e] < cap[e] and not (used_day[e] & bit):
+                        assign_inplace(I, sol, e, s)
+                        n_rep += 1
+                        changed = True
+                        break
+        if prof is not None:
+            prof.add_time('repair', time.perf_counter() - t1)
+            prof.count('repair.assigned', n_rep)
 
         return sol
 
 # =========================
 # Busca Local – Fase 2
 # =========================
+Neighborhood = Callable[[ThompsonSolution, random.Random], Optional[ThompsonSolution]]
+
+# Vizinhanças embutidas do VND (nome -> método de LocalSearch), na ordem padrão:
+# nível 0 primeiro, depois movimentos que melhoram o empregado mais sênior alterado.
+NEIGHBORHOODS: Dict[str, str] = {
+    'uncovered_relocation': '_uncovered_shift_relocation',
+    'seniority_swap':       '_seniority_swap',
+    'same_day_exchange':    '_same_day_exchange',
+    'free_relocation':      '_free_relocation',
+    'three_cycle':          '_three_cycle',
+    'chain_swap':           '_chain_swap',
+}
+
 class LocalSearch:
-    def __init__(self, I: ThompsonInstance):
+    def __init__(self, I: ThompsonInstance, min_uncovered: int = 0,
+                 neighborhoods: Optional[Sequence[Union[str, Neighborhood]]] = None,
+                 time_budget: Optional[float] = None,
+                 profiler: Optional[Profiler] = None):
+        """
+        neighborhoods: ordem do VND; nomes de NEIGHBORHOODS ou funções
+        (sol, rng) -> sol melhorada in-place ou None. Padrão: todas as embutidas.
+        time_budget: limite (s) de cada chamada de improve; None = sem limite.
+        As vizinhanças param (devolvendo None) ao passar do prazo corrente.
+        profiler: tempos/contadores por vizinhança ('ls.<nome>').
+        """
         self.I = I
-
-    def _diss_emp(self, sol: ThompsonSolution, e: EmpId) -> float:
-        return sum(self.I.v_es[(e, s)] for s in self.I.S if sol.assign[s] == e)
+        # ótimo do nível 0 (coverage_bound): abaixo dele não há lacuna a fechar
+        self.min_uncovered = min_uncovered
+        nbs = list(neighborhoods or NEIGHBORHOODS)
+        self.neighborhoods: List[Neighborhood] = [
+            getattr(self, NEIGHBORHOODS[n]) if isinstance(n, str) else n for n in nbs
+        ]
+        self.neighborhood_names: List[str] = [
+            n if isinstance(n, str) else getattr(n, '__name__', repr(n)) for n in nbs
+        ]
+        self.time_budget = time_budget
+        self.profiler = profiler
+        self._deadline = math.inf
+        # Estado da varredura de _seniority_swap para a solução corrente
+        # (don't-look bits): _changed é o log de empregados alterados, na
+        # ordem; _scanned_at[e] = len(_changed) quando e foi varrido por
+        # completo sem achar troca de melhoria (-1 = precisa varredura completa).
+        self._scan_sol: Optional[ThompsonSolution] = None
+        self._changed: List[EmpIdx] = []
+        self._scanned_at: List[int] = []
+
+    def _scan_state(self, sol: ThompsonSolution) -> None:
+        if self._scan_sol is not sol:
+            self._scan_sol = sol
+            self._changed = []
+            self._scanned_at = [-1] * self.I.n_emp
+
+    def _touch(self, e: EmpIdx) -> None:
+        # a alocação de e mudou: e volta a ser varrido por completo e os
+        # mais seniores revisitam apenas os turnos de e
+        if self._scan_sol is not None:
+            self._changed.append(e)
+            self._scanned_at[e] = -1
+
+    def _out_of_time(self) -> bool:
+        return time.perf_counter() >= self._deadline
+
+    def _tally(self, name: str, tried: int, cutoff: bool = False) -> None:
+        prof = self.profiler
+        if prof is not None:
+            prof.count(f'ls.{name}.tried', tried)
+            if cutoff:
+                prof.count(f'ls.{name}.cutoff')
+
+    def _diss_emp(self, sol: ThompsonSolution, e: EmpIdx) -> float:
+        return sol.diss[e]
 
     def _seniority_swap(
         self,
@@ -210,42 +779,68 @@ class LocalSearch:
         max_pairs: int = 100000,
     ) -> Optional[ThompsonSolution]:
         I = self.I
-        E = I.E
-        by_emp = {e: [s for s in I.S if sol.assign[s] == e] for e in E}
+        n_emp = I.n_emp
+        assign, pos, day_bit = sol.assign, sol.pos, I.day_bit
         pairs_tried = 0
-
-        for i in range(len(E) - 1):
-            e_sen = E[i]
-            sen_shifts = by_emp[e_sen]
-            if not sen_shifts:
-                continue
+        self._scan_state(sol)
+        changed, scanned_at = self._changed, self._scanned_at
+
+        for e_sen in range(n_emp - 1):
+            # Um par (s1, s2) só muda de avaliação se o sênior ou o titular de
+            # s2 mudou. Empregado já varrido: só os juniores alterados depois.
+            t_scan = scanned_at[e_sen]
+            if t_scan >= 0:
+                if t_scan == len(changed):
+                    continue
+                hs: Optional[Set[EmpIdx]] = {h for h in changed[t_scan:] if h > e_sen}
+                if not hs:
+                    scanned_at[e_sen] = len(changed)
+                    continue
+            else:
+                hs = None
+            if self._out_of_time():
+                break
+            sen_shifts = shifts_of(I, sol, e_sen)
+            cost_sen = I.cost[e_sen]
+            used_sen = sol.used_day[e_sen]
+            occ_sen, costs_sen = I.order[e_sen], I.order_costs[e_sen]
 
             for s1 in sen_shifts:
-                v_sen_s1 = I.v_es[(e_sen, s1)]
-                d1 = I.d_s[s1]
-
-                for j in range(i + 1, len(E)):
-                    e_jun = E[j]
-                    jun_shifts = by_emp[e_jun]
-                    if not jun_shifts:
+                b1 = day_bit[s1]
+                # Só turnos estritamente melhores que s1 para o sênior:
+                # prefixo occ_sen[:k] da lista elegível ordenada por custo.
+                k = bisect_left(costs_sen, cost_sen[s1])
+                best_p = -1
+                for i in range(k):
+                    s2 = occ_sen[i]
+                    h = assign[s2]
+                    # livre (UNASSIGNED = -1), do próprio sênior ou de alguém mais sênior
+                    if h <= e_sen or (hs is not None and h not in hs):
                         continue
-
-                    for s2 in jun_shifts:
-                        pairs_tried += 1
-                        if pairs_tried > max_pairs:
-                            return None
-                        if (e_sen, s2) not in I.ES:
-                            continue
-                        d2 = I.d_s[s2]
-                        if d1 != d2 and sol.used_day[(e_sen, d2)]:
-                            continue
-                        if I.v_es[(e_sen, s2)] >= v_sen_s1:
-                            continue
-                        if not can_swap(I, sol, s1, s2):
-                            continue
-
-                        swap_inplace(I, sol, s1, s2)
-                        return sol
+                    pairs_tried += 1
+                    if pairs_tried > max_pairs:
+                        self._tally('seniority_swap', pairs_tried - 1, cutoff=True)
+                        return None
+                    b2 = day_bit[s2]
+                    if b1 != b2 and used_sen & b2:
+                        continue
+                    if not can_swap(I, sol, s1, s2):
+                        continue
+                    # entre os viáveis, o de menor vaga (ordem de senioridade
+                    # do titular), o mesmo que a varredura completa acharia
+                    p = pos[s2]
+                    if best_p < 0 or p < best_p:
+                        best_p, best_s2 = p, s2
+
+                if best_p >= 0:
+                    e_jun = assign[best_s2]
+                    swap_inplace(I, sol, s1, best_s2)
+                    self._touch(e_sen)
+                    self._touch(e_jun)
+                    self._tally('seniority_swap', pairs_tried)
+                    return sol
+            scanned_at[e_sen] = len(changed)
+        self._tally('seniority_swap', pairs_tried)
         return None
 
     def _uncovered_shift_relocation(
@@ -254,41 +849,490 @@ class LocalSearch:
         rng: random.Random,
     ) -> Optional[ThompsonSolution]:
         I = self.I
-        uncovered = [s for s in I.S if sol.assign[s] is None]
-        if not uncovered:
+        if len(sol.unassigned) <= self.min_uncovered:
             return None
+        uncovered = sorted(sol.unassigned)
 
+        tried = 0
         for s in uncovered:
-            for e in reversed(I.E):
+            for e in reversed(range(I.n_emp)):
+                tried += 1
                 if can_assign(I, sol, e, s):
                     assign_inplace(I, sol, e, s)
+                    self._touch(e)
+                    self._tally('uncovered_relocation', tried)
+                    return sol
+
+        # nenhuma alocação direta: tenta uma cadeia de realocações
+        for s in uncovered:
+            if self._out_of_time():
+                break
+            tried += 1
+            if self._augmenting_relocation(sol, s) is not None:
+                self._tally('uncovered_relocation', tried)
+                return sol
+        self._tally('uncovered_relocation', tried)
+        return None
+
+    def _augmenting_relocation(
+        self,
+        sol: ThompsonSolution,
+        s0: OccIdx,
+        max_depth: int = 4,
+        max_nodes: int = 5000,
+        min_emp: EmpIdx = UNASSIGNED,
+    ) -> Optional[ThompsonSolution]:
+        """
+        Cadeia de ejeção (caminho aumentante) para cobrir o turno livre s0.
+
+        BFS sobre o grafo de elegibilidade: um nó é uma ocorrência que precisa
+        de empregado. Para cada elegível e de s (I.occ_emps):
+          - e tem capacidade e o dia livre -> fim do caminho;
+          - e já trabalha no dia de s com t -> e troca t por s, t precisa de outro;
+          - e está no MxWk -> e larga algum turno t seu, t precisa de outro.
+        O nível 0 cai em 1 e domina os demais, então qualquer caminho melhora.
+        Só empregados mais juniores que min_emp entram no caminho.
+        """
+        I = self.I
+        cap, load, used_day, assign = I.cap, sol.load, sol.used_day, sol.assign
+        day_bit = I.day_bit
+
+        # nó: (ocorrência a cobrir, índice do pai, profundidade)
+        nodes: List[Tuple[OccIdx, int, int]] = [(s0, -1, 0)]
+        seen = {s0}
+        head = 0
+        prof = self.profiler
+        while head < len(nodes):
+            if self._out_of_time():
+                break
+            s, _, depth = nodes[head]
+            # empregados que já mudam neste caminho (titulares dos nós ancestrais)
+            path_emps = set()
+            k = head
+            while k > 0:
+                path_emps.add(assign[nodes[k][0]])
+                k = nodes[k][1]
+
+            bit = day_bit[s]
+            for e in I.occ_emps[s]:
+                if e <= min_emp or e in path_emps:
+                    continue
+                if used_day[e] & bit:
+                    nxt = [t for t in shifts_of(I, sol, e) if day_bit[t] == bit]
+                elif load[e] >= cap[e]:
+                    nxt = shifts_of(I, sol, e)
+                else:
+                    self._apply_chain(sol, nodes, head, e)
+                    if prof is not None:
+                        prof.count('ls.ejection_chain.nodes', head + 1)
+                    return sol
+                if depth < max_depth:
+                    for t in nxt:
+                        if t not in seen and len(nodes) < max_nodes:
+                            seen.add(t)
+                            nodes.append((t, head, depth + 1))
+            head += 1
+        if prof is not None:
+            prof.count('ls.ejection_chain.nodes', head)
+        return None
+
+    def _apply_chain(self, sol: ThompsonSolution, nodes: List[Tuple[OccIdx, int, int]],
+                     last: int, e_last: EmpIdx) -> None:
+        # caminho raiz -> último nó; o titular de cada nó assume a ocorrência do pai
+        path = []
+        k = last
+        while k >= 0:
+            path.append(nodes[k][0])
+            k = nodes[k][1]
+        path.reverse()
+        holders = [sol.assign[s] for s in path]
+        for i in range(1, len(path)):
+            unassign_inplace(self.I, sol, path[i])
+            assign_inplace(self.I, sol, holders[i], path[i - 1])
+            self._touch(holders[i])
+        assign_inplace(self.I, sol, e_last, path[-1])
+        self._touch(e_last)
+
+    def _same_day_exchange(
+        self,
+        sol: ThompsonSolution,
+        rng: random.Random,
+        max_pairs: int = 100000,
+    ) -> Optional[ThompsonSolution]:
+        # Troca de turnos do mesmo dia entre dois empregados. Cobre o que a
+        # troca por senioridade não faz: custo igual para o sênior e melhor
+        # para o júnior (avaliado por swap_improves, sem aplicar).
+        I = self.I
+        assign, day_bit = sol.assign, I.day_bit
+        pairs_tried = 0
+        for e1 in range(I.n_emp - 1):
+            if self._out_of_time():
+                break
+            cost1 = I.cost[e1]
+            occ1, costs1 = I.order[e1], I.order_costs[e1]
+            for s1 in shifts_of(I, sol, e1):
+                b1 = day_bit[s1]
+                for i in range(bisect_right(costs1, cost1[s1])):
+                    s2 = occ1[i]
+                    if day_bit[s2] != b1 or assign[s2] <= e1:
+                        continue
+                    pairs_tried += 1
+                    if pairs_tried > max_pairs:
+                        self._tally('same_day_exchange', pairs_tried - 1, cutoff=True)
+                        return None
+                    if can_swap(I, sol, s1, s2) and swap_improves(I, sol, s1, s2):
+                        e2 = assign[s2]
+                        swap_inplace(I, sol, s1, s2)
+                        self._touch(e1)
+                        self._touch(e2)
+                        self._tally('same_day_exchange', pairs_tried)
+                        return sol
+        self._tally('same_day_exchange', pairs_tried)
+        return None
+
+    def _free_relocation(
+        self,
+        sol: ThompsonSolution,
+        rng: random.Random,
+    ) -> Optional[ThompsonSolution]:
+        # O empregado troca um turno seu por uma ocorrência livre mais barata
+        # para ele (em outro dia livre dele, ou no mesmo dia). O nível 0 não
+        # muda e só ele é alterado.
+        I = self.I
+        unassigned = sol.unassigned
+        if not unassigned:
+            return None
+        day_bit = I.day_bit
+        tried = 0
+        for e in range(I.n_emp):
+            if self._out_of_time():
+                break
+            cost_e = I.cost[e]
+            occ_e, costs_e = I.order[e], I.order_costs[e]
+            used_e = sol.used_day[e]
+            for s in shifts_of(I, sol, e):
+                b = day_bit[s]
+                for i in range(bisect_left(costs_e, cost_e[s])):
+                    t = occ_e[i]
+                    if t not in unassigned:
+                        continue
+                    tried += 1
+                    bt = day_bit[t]
+                    if bt != b and used_e & bt:
+                        continue
+                    unassign_inplace(I, sol, s)
+                    assign_inplace(I, sol, e, t)
+                    self._touch(e)
+                    self._tally('free_relocation', tried)
                     return sol
+        self._tally('free_relocation', tried)
+        return None
+
+    def _three_cycle(
+        self,
+        sol: ThompsonSolution,
+        rng: random.Random,
+        max_tries: int = 100000,
+    ) -> Optional[ThompsonSolution]:
+        # Ciclo e1 <- s2 (de e2), e2 <- s3 (de e3), e3 <- s1 (de e1), com e1 o
+        # mais sênior e s2 estritamente melhor para ele: melhora mesmo quando
+        # e2 não pode receber s1 diretamente.
+        I = self.I
+        assign, used_day, day_bit = sol.assign, sol.used_day, I.day_bit
+        tries = 0
+        for e1 in range(I.n_emp - 2):
+            if self._out_of_time():
+                break
+            cost1 = I.cost[e1]
+            occ1, costs1 = I.order[e1], I.order_costs[e1]
+            used1 = used_day[e1]
+            for s1 in shifts_of(I, sol, e1):
+                b1 = day_bit[s1]
+                for i in range(bisect_left(costs1, cost1[s1])):
+                    s2 = occ1[i]
+                    e2 = assign[s2]
+                    if e2 <= e1:
+                        continue
+                    b2 = day_bit[s2]
+                    if b1 != b2 and used1 & b2:
+                        continue
+                    cost2, used2 = I.cost[e2], used_day[e2]
+                    for e3 in I.occ_emps[s1]:
+                        if e3 <= e1 or e3 == e2:
+                            continue
+                        used3 = used_day[e3]
+                        for s3 in shifts_of(I, sol, e3):
+                            tries += 1
+                            if tries > max_tries:
+                                self._tally('three_cycle', tries - 1, cutoff=True)
+                                return None
+                            if s3 not in cost2:
+                                continue
+                            b3 = day_bit[s3]
+                            if b3 != b2 and used2 & b3:
+                                continue
+                            if b1 != b3 and used3 & b1:
+                                continue
+                            for s in (s1, s2, s3):
+                                unassign_inplace(I, sol, s)
+                            assign_inplace(I, sol, e1, s2)
+                            assign_inplace(I, sol, e2, s3)
+                            assign_inplace(I, sol, e3, s1)
+                            for e in (e1, e2, e3):
+                                self._touch(e)
+                            self._tally('three_cycle', tries)
+                            return sol
+        self._tally('three_cycle', tries)
+        return None
+
+    def _chain_swap(
+        self,
+        sol: ThompsonSolution,
+        rng: random.Random,
+        max_tries: int = 2000,
+        max_depth: int = 3,
+        max_nodes: int = 200,
+    ) -> Optional[ThompsonSolution]:
+        # e1 pega s2 (estritamente melhor, de um júnior e2) e libera s1; s1 é
+        # recoberto por uma cadeia de ejeção só com empregados mais juniores
+        # que e1 (_augmenting_relocation). e1 é o mais sênior alterado e
+        # melhora, o nível 0 não muda: a cadeia toda é uma melhoria.
+        I = self.I
+        assign, day_bit = sol.assign, I.day_bit
+        tries = 0
+        for e1 in range(I.n_emp - 1):
+            if self._out_of_time():
+                break
+            cost1 = I.cost[e1]
+            occ1, costs1 = I.order[e1], I.order_costs[e1]
+            for s1 in shifts_of(I, sol, e1):
+                b1 = day_bit[s1]
+                for i in range(bisect_left(costs1, cost1[s1])):
+                    s2 = occ1[i]
+                    e2 = assign[s2]
+                    if e2 <= e1:
+                        continue
+                    b2 = day_bit[s2]
+                    if b1 != b2 and sol.used_day[e1] & b2:
+                        continue
+                    tries += 1
+                    if tries > max_tries:
+                        self._tally('chain_swap', tries - 1, cutoff=True)
+                        return None
+                    unassign_inplace(I, sol, s2)
+                    unassign_inplace(I, sol, s1)
+                    assign_inplace(I, sol, e1, s2)
+                    if self._augmenting_relocation(sol, s1, max_depth=max_depth,
+                                                   max_nodes=max_nodes, min_emp=e1) is not None:
+                        self._touch(e1)
+                        self._touch(e2)
+                        self._tally('chain_swap', tries)
+                        return sol
+                    # desfaz
+                    unassign_inplace(I, sol, s2)
+                    assign_inplace(I, sol, e1, s1)
+                    assign_inplace(I, sol, e2, s2)
+        self._tally('chain_swap', tries)
         return None
 
     def improve(
         self,
         sol: ThompsonSolution,
         rng: random.Random,
-        max_ls_iters: int = 200,
+        max_ls_iters: int = 5000,
+        deadline: Optional[float] = None,
     ) -> ThompsonSolution:
+        """
+        VND: aplica a primeira vizinhança (na ordem de self.neighborhoods) que
+        encontrar melhoria e volta para a primeira; termina quando nenhuma
+        melhora, após max_ls_iters melhorias ou no prazo: o menor entre
+        deadline (instante em time.perf_counter()) e início + time_budget.
+        """
         best = sol
+        self._scan_state(sol)
+        moves = self.neighborhoods
+        self._deadline = math.inf if deadline is None else deadline
+        if self.time_budget is not None:
+            self._deadline = min(self._deadline, time.perf_counter() + self.time_budget)
+        prof = self.profiler
         it = 0
-        while it < max_ls_iters:
-            it += 1
-            improved = False
-            s1 = self._seniority_swap(best, rng)
-            if s1 is not None:
-                best = s1
-                improved = True
-            else:
-                s2 = self._uncovered_shift_relocation(best, rng)
-                if s2 is not None:
-                    best = s2
-                    improved = True
-            if not improved:
+        k = 0
+        while k < len(moves) and it < max_ls_iters:
+            if self._out_of_time():
                 break
+            if prof is None:
+                found = moves[k](best, rng) is not None
+            else:
+                name = self.neighborhood_names[k]
+                t0 = time.perf_counter()
+                found = moves[k](best, rng) is not None
+                prof.add_time(f'ls.{name}', time.perf_counter() - t0)
+                prof.count(f'ls.{name}.calls')
+                if found:
+                    prof.count(f'ls.{name}.accepted')
+            if found:
+                it += 1
+                k = 0
+            else:
+                k += 1
+        self._scan_sol = None
+        self._deadline = math.inf
         return best
 
+# =========================
+# Conjunto elite + path relinking
+# =========================
+def copy_solution(sol: ThompsonSolution) -> ThompsonSolution:
+    return ThompsonSolution(array('i', sol.assign), array('i', sol.load), array('B', sol.used_day),
+                            array('i', sol.slots), array('i', sol.pos), array('d', sol.diss),
+                            set(sol.unassigned))
+
+def _diff_occs(a: ThompsonSolution, b: ThompsonSolution) -> np.ndarray:
+    return np.flatnonzero(np.frombuffer(a.assign, dtype=np.intc) != np.frombuffer(b.assign, dtype=np.intc))
+
+def hamming(a: ThompsonSolution, b: ThompsonSolution) -> int:
+    """Ocorrências com empregado diferente nas duas soluções (livre conta como um valor)."""
+    return len(_diff_occs(a, b))
+
+def lex_delta_better(a: Iterable[Tuple[int, float]], b: Iterable[Tuple[int, float]]) -> bool:
+    """O movimento de variações a é lexicograficamente melhor que o de variações b."""
+    d: Dict[int, float] = {}
+    for k, v in a:
+        d[k] = d.get(k, 0.0) + v
+    for k, v in b:
+        d[k] = d.get(k, 0.0) - v
+    return lex_delta_improves(d.items())
+
+class ElitePool:
+    """
+    Até `size` soluções boas e diversas (distância de Hamming das alocações).
+    Uma solução nova entra se for melhor que todas, ou se distar pelo menos
+    min_dist de cada membro e, com o conjunto cheio, for melhor que algum.
+    Cheio, sai o membro pior que ela mais parecido com ela.
+    """
+    def __init__(self, size: int, min_dist: int):
+        self.size = size
+        self.min_dist = min_dist
+        self.sols: List[ThompsonSolution] = []
+
+    def __len__(self) -> int:
+        return len(self.sols)
+
+    def add(self, sol: ThompsonSolution) -> bool:
+        dist = [hamming(sol, x) for x in self.sols]
+        if 0 in dist:
+            return False
+        worse = [i for i, x in enumerate(self.sols) if sol_lex_better(sol, x)]
+        is_best = len(worse) == len(self.sols)
+        diverse = all(d >= self.min_dist for d in dist)
+        if not (is_best or diverse):
+            return False
+        if len(self.sols) < self.size:
+            self.sols.append(sol)
+            return True
+        if not worse:
+            return False
+        self.sols[min(worse, key=dist.__getitem__)] = sol
+        return True
+
+    def pick(self, sol: ThompsonSolution, rng: random.Random) -> Optional[ThompsonSolution]:
+        """Membro sorteado com peso = distância a sol (None se todos coincidem com sol)."""
+        dist = [hamming(sol, x) for x in self.sols]
+        if not any(dist):
+            return None
+        return rng.choices(self.sols, weights=dist)[0]
+
+def _relink_move(I: ThompsonInstance, sol: ThompsonSolution, guide: ThompsonSolution, s: OccIdx):
+    """
+    Passo do path relinking, sem aplicá-lo: s passa ao empregado e_new que a
+    tem em guide. Se e_new já trabalha no dia de s ou está em MxWk, larga um
+    turno t (o do mesmo dia, ou o de maior custo dentre os que guide não lhe
+    dá), que vai para o antigo dono de s quando cabe, senão fica livre.
+    Devolve (e_new, t, t_to_old, variações (nível, delta)).
+    """
+    e_new, e_old = guide.assign[s], sol.assign[s]
+    if e_new == UNASSIGNED:
+        return e_new, UNASSIGNED, False, ((0, 1.0), (e_old + 1, -I.cost[e_old][s]))
+
+    c_new = I.cost[e_new]
+    bit = I.day_bit[s]
+    t = UNASSIGNED
+    if sol.used_day[e_new] & bit:
+        # em guide e_new faz s nesse dia, então t também difere de guide
+        t = next(x for x in shifts_of(I, sol, e_new) if I.day_bit[x] == bit)
+    elif sol.load[e_new] >= I.cap[e_new]:
+        # existe: guide é viável e dá s a e_new
+        t = max((x for x in shifts_of(I, sol, e_new) if guide.assign[x] != e_new),
+                key=c_new.__getitem__)
+
+    changes = [(e_new + 1, c_new[s] - (c_new[t] if t != UNASSIGNED else 0.0))]
+    d_unc = 0.0
+    t_to_old = False
+    if e_old == UNASSIGNED:
+        d_unc -= 1.0
+    else:
+        c_old = I.cost[e_old]
+        d_old = -c_old[s]
+        # e_old acabou de liberar s (vaga e dia de s)
+        if t != UNASSIGNED and t in c_old and (I.day_bit[t] == bit or not sol.used_day[e_old] & I.day_bit[t]):
+            t_to_old = True
+            d_old += c_old[t]
+        changes.append((e_old + 1, d_old))
+    if t != UNASSIGNED and not t_to_old:
+        d_unc += 1.0
+    changes.append((0, d_unc))
+    return e_new, t, t_to_old, changes
+
+def _relink_apply(I: ThompsonInstance, sol: ThompsonSolution, s: OccIdx,
+                  e_new: EmpIdx, t: OccIdx, t_to_old: bool) -> None:
+    e_old = sol.assign[s]
+    if t != UNASSIGNED:
+        unassign_inplace(I, sol, t)
+    if e_old != UNASSIGNED:
+        unassign_inplace(I, sol, s)
+    if e_new != UNASSIGNED:
+        assign_inplace(I, sol, e_new, s)
+    if t_to_old:
+        assign_inplace(I, sol, e_old, t)
+
+def path_relink(I: ThompsonInstance, start: ThompsonSolution, guide: ThompsonSolution,
+                rng: random.Random, max_steps: Optional[int] = None,
+                sample: int = 32, deadline: Optional[float] = None) -> Optional[ThompsonSolution]:
+    """
+    Caminha de start em direção a guide. A cada passo avalia (por delta) o
+    movimento de até `sample` ocorrências sorteadas dentre as que ainda
+    diferem e aplica o lexicograficamente melhor; a ocorrência fixada não
+    volta a divergir, então o caminho tem no máximo hamming(start, guide)
+    passos. Devolve uma cópia da melhor solução intermediária (nem start
+    nem guide), ou None se não houver nenhuma. Para em deadline
+    (time.perf_counter()), devolvendo a melhor vista até ali.
+    """
+    diff = set(_diff_occs(start, guide).tolist())
+    sol = copy_solution(start)
+    best: Optional[ThompsonSolution] = None
+    steps = 0
+    while diff and (max_steps is None or steps < max_steps):
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        pool = sorted(diff)
+        cand = pool if len(pool) <= sample else rng.sample(pool, sample)
+        best_move = None
+        for s in cand:
+            mv = _relink_move(I, sol, guide, s)
+            if best_move is None or lex_delta_better(mv[3], best_move[1][3]):
+                best_move = (s, mv)
+        s, (e_new, t, t_to_old, _) = best_move
+        _relink_apply(I, sol, s, e_new, t, t_to_old)
+        steps += 1
+        diff.discard(s)
+        if t != UNASSIGNED and sol.assign[t] == guide.assign[t]:
+            diff.discard(t)
+        if not diff:
+            break  # chegou em guide
+        if best is None or sol_lex_better(sol, best):
+            best = copy_solution(sol)
+    return best
+
 # =========================
 # Reactive α
 # =========================
@@ -326,7 +1370,20 @@ class ThompsonGRASP:
         construction: str = 'traditional',
         alpha_list: Optional[List[float]] = None,
         random_p: float = 0.25,
-        random_seed: int = 123
+        random_seed: int = 123,
+        min_uncovered: Optional[int] = None,
+        neighborhoods: Optional[Sequence[Union[str, Neighborhood]]] = None,
+        ls_time_budget: Optional[float] = None,
+        n_workers: int = 1,
+        batch_size: Optional[int] = None,
+        elite_size: int = 0,
+        elite_min_dist: Optional[int] = None,
+        pr_max_steps: Optional[int] = None,
+        construction_time_budget: Optional[float] = None,
+        pr_time_budget: Optional[float] = None,
+        target_value: Optional[float] = None,
+        stop_at_bound: bool = False,
+        profiler: Optional[Profiler] = None
     ):
         assert construction in ('traditional','random_plus_greedy','reactive')
         self.I = inst
@@ -337,9 +1394,62 @@ class ThompsonGRASP:
         self.random_p = random_p
         self.rng = random.Random(random_seed)
         self.cons = Constructor(inst)
-        self.ls = LocalSearch(inst)
+        # nível 0 exato por fluxo máximo; atingido, a busca local não procura mais lacunas
+        self.min_uncovered = coverage_min_uncovered(inst) if min_uncovered is None else min_uncovered
+        # o limite por chamada da busca local vem de self.budget (cota 'local_search')
+        self.ls = LocalSearch(inst, min_uncovered=self.min_uncovered, neighborhoods=neighborhoods)
         self.reactive = ReactiveAlpha(alpha_list or [0.0,0.2,0.4,0.6,0.8,1.0]) if construction=='reactive' else None
         self.random_seed = random_seed
+        # (iteração, nível lexicográfico da melhoria), para diagnóstico
+        self.improvements: List[Tuple[int, int]] = []
+        # Modo paralelo (n_workers > 1): iterações em lotes de batch_size
+        # (padrão: n_workers) num pool de processos; ver _run_parallel.
+        self.n_workers = n_workers
+        self.batch_size = batch_size or n_workers
+        self.neighborhoods = neighborhoods
+        self.ls_time_budget = ls_time_budget
+        self.parallel_stats: Dict[str, float] = {}
+        # Conjunto elite + path relinking (elite_size > 0; só no modo sequencial):
+        # cada ótimo local é religado a um membro elite e a melhor solução do
+        # caminho, após busca local, concorre como resultado da iteração.
+        self.elite_size = elite_size
+        self.elite_min_dist = max(1, inst.n_occ // 20) if elite_min_dist is None else elite_min_dist
+        self.pr_max_steps = pr_max_steps
+        self.elite: Optional[ElitePool] = None
+        # Orçamento de tempo (criado em run): prazo global max_time_sec e cotas
+        # por chamada de cada fase. Paradas extras: report_value <= target_value
+        # e, com stop_at_bound, nível 0 igual ao limite min_uncovered.
+        self.construction_time_budget = construction_time_budget
+        self.pr_time_budget = pr_time_budget
+        self.target_value = target_value
+        self.stop_at_bound = stop_at_bound
+        self.budget: Optional[TimeBudget] = None
+        self.stop_reason = ''
+        # Instrumentação opcional (ver Profiler); no modo paralelo cada processo
+        # mede as suas iterações e o principal agrega.
+        self.profiler = profiler
+        self.cons.profiler = profiler
+        self.ls.profiler = profiler
+
+    def _new_budget(self) -> TimeBudget:
+        self.budget = TimeBudget(self.max_time_sec, {
+            'construction': self.construction_time_budget,
+            'local_search': self.ls_time_budget,
+            'path_relinking': self.pr_time_budget,
+        })
+        return self.budget
+
+    def _stop_reason(self, best_sol: ThompsonSolution, it: int, last_improve_iter: int) -> str:
+        """Critério de parada atingido ('' = continua)."""
+        if self.budget.expired():
+            return 'time'
+        if self.stop_at_bound and len(best_sol.unassigned) <= self.min_uncovered:
+            return 'bound'
+        if self.target_value is not None and report_value(self.I, best_sol) <= self.target_value:
+            return 'target'
+        if it - last_improve_iter >= self.max_iters_no_improvement:
+            return 'no_improvement'
+        return ''
 
     def run(self) -> Tuple[ThompsonSolution, LexCost, int, int]:
         """
@@ -349,56 +1459,221 @@ class ThompsonGRASP:
           - iteração em que houve a última melhoria (convergência)
           - número total de iterações executadas
 
-        Critério de parada:
-          - (OU) tempo máximo (max_time_sec)
+        Critério de parada (self.stop_reason):
+          - (OU) tempo máximo (max_time_sec), verificado também dentro da
+            construção e da busca local ('time')
           - (OU) iterações sem melhoria (max_iters_no_improvement)
+          - (OU) report_value <= target_value ('target')
+          - (OU) stop_at_bound e nível 0 no limite min_uncovered ('bound')
         """
+        if self.n_workers > 1:
+            return self._run_parallel()
+
         best_sol: Optional[ThompsonSolution] = None
-        best_cost: Optional[LexCost] = None
+        self.improvements = []
+        self.elite = ElitePool(self.elite_size, self.elite_min_dist) if self.elite_size > 0 else None
+        budget = self._new_budget()
 
         last_improve_iter = 0
         total_iters = 0
 
-        t_start = time.time()
         it = 0
 
         while True:
             it += 1
 
             a = self.alpha if self.reactive is None else self.reactive.sample(self.rng)
-            s = self.cons.build(alpha=a, rng=self.rng, strategy=self.construction, random_p=self.random_p)
-            s = self.ls.improve(s, rng=self.rng)
-            c = lex_cost(self.I, s)
+            s = self.cons.build(alpha=a, rng=self.rng, strategy=self.construction, random_p=self.random_p,
+                                deadline=budget.phase_deadline('construction'))
+            s = self.ls.improve(s, rng=self.rng, deadline=budget.phase_deadline('local_search'))
+            rv = report_value(self.I, s)
+            if self.elite is not None:
+                s = self._relink(s)
 
             total_iters = it
-            
-            if (best_cost is None) or lex_better(c, best_cost):
-                best_sol, best_cost = s, c
+
+            prof = self.profiler
+            t0 = time.perf_counter() if prof is not None else 0.0
+            # compara os vetores correntes; LexCost só é montado no fim
+            improved = best_sol is None or sol_lex_better(s, best_sol)
+            if improved:
+                self.improvements.append((it, 0 if best_sol is None else sol_first_diff_level(s, best_sol)))
+                best_sol = s
                 last_improve_iter = it
 
             if self.reactive:
-                self.reactive.update(a, c.report_value)
+                self.reactive.update(a, rv)
+            if prof is not None:
+                prof.add_time('evaluation', time.perf_counter() - t0)
+                prof.end_iteration(it, alpha=a, report_value=rv,
+                                   n_uncovered=len(s.unassigned), improved=improved)
 
             # --- CRITÉRIOS DE PARADA (LÓGICA 'OR') ---
-
-            # 1. Critério de tempo
-            elapsed = time.time() - t_start
-            if elapsed >= self.max_time_sec:
+            self.stop_reason = self._stop_reason(best_sol, it, last_improve_iter)
+            if self.stop_reason:
                 break
 
-            # 2. Critério de iterações sem melhoria (convergência) # <-- NOVO
-            iters_since_last_improvement = it - last_improve_iter
-            if iters_since_last_improvement >= self.max_iters_no_improvement:
-                break
+        assert best_sol is not None
+        if self.profiler is not None:
+            self.profiler.end_run(stop_reason=self.stop_reason, iterations=total_iters,
+                                  best_report_value=report_value(self.I, best_sol))
+        return best_sol, lex_cost(self.I, best_sol), last_improve_iter, total_iters
+
+    def _relink(self, s: ThompsonSolution) -> ThompsonSolution:
+        """Path relinking de s com um membro elite; atualiza o conjunto e devolve a melhor das duas."""
+        elite = self.elite
+        g = elite.pick(s, self.rng) if len(elite) else None
+        if g is not None:
+            t0 = time.perf_counter()
+            r = path_relink(self.I, s, g, self.rng, max_steps=self.pr_max_steps,
+                            deadline=self.budget.phase_deadline('path_relinking'))
+            if self.profiler is not None:
+                self.profiler.add_time('path_relinking', time.perf_counter() - t0)
+                self.profiler.count('path_relinking.calls')
+            if r is not None:
+                r = self.ls.improve(r, rng=self.rng, deadline=self.budget.phase_deadline('local_search'))
+                elite.add(r)
+                if sol_lex_better(r, s):
+                    elite.add(s)
+                    return r
+        elite.add(s)
+        return s
+
+    def _run_parallel(self) -> Tuple[ThompsonSolution, LexCost, int, int]:
+        """
+        Mesmo contrato de run(), com construção + busca local em n_workers processos.
+
+        - A iteração k usa random.Random(f"{random_seed}:{k}"): o resultado de
+          cada iteração não depende de qual processo a executou.
+        - As iterações saem em lotes de batch_size; α de cada uma é sorteado
+          no processo principal (reativo: probabilidades do fim do lote anterior).
+        - O incumbente é compartilhado (vetor [não alocados, diss por empregado]
+          em memória compartilhada, atualizado ao fim de cada lote); um
+          processo só devolve a alocação se ela for lexicograficamente melhor.
+        - Os resultados de um lote são combinados na ordem de k, como no modo
+          sequencial. Para (random_seed, batch_size) fixos, o resultado é
+          determinístico (exceto pelo corte por tempo).
+        - Cada iteração recebe o prazo absoluto do orçamento global e calcula
+          o tempo restante ao começar (não ao sair o lote): com batch_size >
+          n_workers, uma iteração que espera na fila não ganha tempo extra.
+
+        Em self.parallel_stats: tempo de parede, soma do tempo de CPU das
+        iterações e utilization = soma / (parede * processos), a fração do
+        tempo em que os processos estiveram ocupados. Não é speedup: isso
+        exigiria medir a mesma execução no modo sequencial.
+        """
+        I = self.I
+        best_sol: Optional[ThompsonSolution] = None
+        self.improvements = []
+        last_improve_iter = 0
+        total_iters = 0
+        task_sec = 0.0
 
-        assert best_sol is not None and best_cost is not None
-        return best_sol, best_cost, last_improve_iter, total_iters
+        ctx = mp.get_context()
+        shared_best = ctx.Array('d', [math.inf] * (I.n_emp + 1))
+        spec = (I.tables, I.LAMBDA_LUNCH, I.PENALTY_UNALLOC, I.cache, self.construction,
+                self.random_p, self.random_seed, self.min_uncovered, self.neighborhoods,
+                {'construction': self.construction_time_budget, 'local_search': self.ls_time_budget},
+                self.profiler is not None)
+
+        budget = self._new_budget()
+        it = 0
+        stop = False
+        with ctx.Pool(self.n_workers, initializer=_grasp_worker_init,
+                      initargs=(spec, shared_best)) as pool:
+            while not stop:
+                batch = []
+                for _ in range(self.batch_size):
+                    it += 1
+                    a = self.alpha if self.reactive is None else self.reactive.sample(self.rng)
+                    batch.append((it, a, budget.deadline))
+
+                for k, a, rv, n_unc, dt, assign, prof_it in pool.starmap(_grasp_worker_iteration, batch):
+                    total_iters = k
+                    task_sec += dt
+                    improved = False
+                    if assign is not None:
+                        s = solution_from_assign(I, array('i', assign))
+                        if best_sol is None or sol_lex_better(s, best_sol):
+                            self.improvements.append(
+                                (k, 0 if best_sol is None else sol_first_diff_level(s, best_sol)))
+                            best_sol = s
+                            last_improve_iter = k
+                            improved = True
+                    if self.reactive:
+                        self.reactive.update(a, rv)
+                    if self.profiler is not None:
+                        self.profiler.end_iteration(k, *prof_it, alpha=a, report_value=rv,
+                                                    n_uncovered=n_unc, improved=improved)
+                    if best_sol is not None:
+                        self.stop_reason = self._stop_reason(best_sol, k, last_improve_iter)
+                        if self.stop_reason:
+                            stop = True
+                            break
+
+                if best_sol is not None:
+                    shared_best[:] = [float(len(best_sol.unassigned))] + list(best_sol.diss)
+                if budget.expired():
+                    self.stop_reason = self.stop_reason or 'time'
+                    stop = True
+
+        wall = budget.elapsed()
+        self.parallel_stats = {
+            'workers': self.n_workers,
+            'wall_sec': wall,
+            'task_sec': task_sec,
+            'utilization': task_sec / (wall * self.n_workers) if wall > 0 else 0.0,
+        }
+        assert best_sol is not None
+        if self.profiler is not None:
+            self.profiler.end_run(stop_reason=self.stop_reason, iterations=total_iters,
+                                  best_report_value=report_value(I, best_sol), **self.parallel_stats)
+        return best_sol, lex_cost(I, best_sol), last_improve_iter, total_iters
+
+# --- Processos do modo paralelo (estado por processo, criado no initializer) ---
+_WORKER: Optional[Dict[str, object]] = None
+
+def _grasp_worker_init(spec, shared_best) -> None:
+    global _WORKER
+    (tables, lambda_lunch, penalty, cache, construction, random_p,
+     seed, min_uncovered, neighborhoods, quotas, profile) = spec
+    I = ThompsonInstance.from_tables(tables, LAMBDA_LUNCH=lambda_lunch,
+                                     PENALTY_UNALLOC=penalty, cache=cache)
+    prof = Profiler() if profile else None
+    _WORKER = {
+        'I': I,
+        'cons': Constructor(I, profiler=prof),
+        'ls': LocalSearch(I, min_uncovered=min_uncovered, neighborhoods=neighborhoods, profiler=prof),
+        'profiler': prof,
+        'quotas': quotas,
+        'construction': construction,
+        'random_p': random_p,
+        'seed': seed,
+        'best': shared_best,
+    }
+
+def _grasp_worker_iteration(k: int, alpha: float, deadline: float):
+    w = _WORKER
+    t0 = time.process_time()
+    # deadline em perf_counter do processo principal (relógio monotônico do
+    # sistema, o mesmo em todos os processos); o restante conta a partir daqui
+    budget = TimeBudget(max(0.0, deadline - time.perf_counter()), w['quotas'])
+    rng = random.Random(f"{w['seed']}:{k}")
+    s = w['cons'].build(alpha=alpha, rng=rng, strategy=w['construction'], random_p=w['random_p'],
+                        deadline=budget.phase_deadline('construction'))
+    s = w['ls'].improve(s, rng=rng, deadline=budget.phase_deadline('local_search'))
+    vec = [float(len(s.unassigned))] + list(s.diss)
+    best = w['best'][:]
+    assign = bytes(s.assign) if lex_vec_better(vec, best) else None
+    prof = w['profiler']
+    prof_it = prof.take_iteration() if prof is not None else ({}, {})
+    return (k, alpha, report_value(w['I'], s), len(s.unassigned),
+            time.process_time() - t0, assign, prof_it)
 
 # =========================
 # Relatório textual (para debug / visualização)
 # =========================
 def summarize_solution(I: ThompsonInstance, sol: ThompsonSolution, cost: LexCost) -> str:
-    # (sem alterações nesta função)
     lines: List[str] = []
     n_unalloc = int(cost.comp[0])
     lines.append("\nOtimização (GRASP) concluída!")
@@ -408,9 +1683,7 @@ def summarize_solution(I: ThompsonInstance, sol: ThompsonSolution, cost: LexCost
         diss_e = cost.comp[idx]
         lines.append(f"  Nível {idx} (insatisfação de {e}) -> valor: {diss_e:.2f}")
     
-    alocacoes_por_empregado: Dict[EmpId, List[Occ]] = {
-        e: list(sol.by_emp[e]) for e in I.E
-    }
+    alocacoes_por_empregado = solution_by_emp(I, sol)
     turnos_alocados_count = sum(len(v) for v in alocacoes_por_empregado.values())
 
     lines.append("\n--- Alocações por Empregado ---")
@@ -421,7 +1694,7 @@ def summarize_solution(I: ThompsonInstance, sol: ThompsonSolution, cost: LexCost
         )
         lines.append(f"  {e} ({len(alocados)} / {I.m_e[e]} turnos): {alocados}")
 
-    turnos_nao_alocados = sorted(list(sol.unassigned))
+    turnos_nao_alocados = sorted(I.S[k] for k in sol.unassigned)
     lines.append("\n--- Turnos NÃO Alocados ---")
     if turnos_nao_alocados:
         for s in turnos_nao_alocados:
@@ -432,7 +1705,8 @@ def summarize_solution(I: ThompsonInstance, sol: ThompsonSolution, cost: LexCost
 
     lines.append("\n--- Atribuições por Turno (todos os turnos) ---")
     for s in sorted(I.S, key=lambda x: (I.d_s[x], I.ST_s[x], x[1])):
-        e = sol.assign[s]
+        k = sol.assign[I.occ_idx[s]]
+        e = I.E[k] if k != UNASSIGNED else None
         if e is None:
             lines.append(
                 f"  Turno (Dia: {s[0]}, ID: {s[1]}) -> NÃO ALOCADO "
@@ -457,14 +1731,25 @@ def summarize_solution(I: ThompsonInstance, sol: ThompsonSolution, cost: LexCost
 # Funções auxiliares para rodar TODAS as instâncias e salvar em CSV
 # =========================
 
-def load_instance_module(path: str):
-    module_name = os.path.splitext(os.path.basename(path))[0]
-    spec = importlib.util.spec_from_file_location(module_name, path)
-    if spec is None or spec.loader is None:
-        raise ImportError(f"Não foi possível carregar a especificação para {path}")
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
+def load_instance(path: str, LAMBDA_LUNCH: float = 0.0,
+                  cache: Optional[DerivedCache] = None,
+                  require_candidates: bool = True) -> ThompsonInstance:
+    """Carrega uma instância .nbi (mmap, sem dicionários) ou .py (executa o módulo)."""
+    if path.endswith(INSTANCE_EXT):
+        return ThompsonInstance.from_tables(read_instance(path), LAMBDA_LUNCH=LAMBDA_LUNCH, cache=cache,
+                                            require_candidates=require_candidates)
+    mod = load_instance_module(path)
+    return ThompsonInstance(mod.employee_data, mod.shift_data, mod.shift_requirements,
+                            LAMBDA_LUNCH=LAMBDA_LUNCH, cache=cache,
+                            require_candidates=require_candidates)
+
+def list_instance_files(inst_dir: str) -> List[str]:
+    """Arquivos de instância de inst_dir; se existir X.nbi, ele substitui X.py."""
+    names = sorted(os.listdir(inst_dir))
+    stems_bin = {os.path.splitext(f)[0] for f in names if f.endswith(INSTANCE_EXT)}
+    return [f for f in names
+            if f.endswith(INSTANCE_EXT)
+            or (f.endswith(".py") and os.path.splitext(f)[0] not in stems_bin)]
 
 def _write_csv(path: str, rows: List[Dict[str, object]], context_msg: str):
     if not rows:
@@ -487,138 +1772,295 @@ def _write_csv(path: str, rows: List[Dict[str, object]], context_msg: str):
          print(f"  [ERRO INESPERADO] {context_msg} ao salvar {path}: {e}")
 
 
+STRATEGIES = ["traditional", "random_plus_greedy", "reactive"]
+ALPHA_TRAD = 0.25
+ALPHA_LIST_REACT = [0.0, 0.2, 0.4, 0.6, 0.8, 1.0]
+RANDOM_P_RPG = 0.30
+
+# Colunas do CSV de resultados (fixas: as linhas são gravadas uma a uma).
+# error != "" marca um job que falhou (só instância/estratégia/semente/limites preenchidos)
+RESULT_FIELDS = sorted([
+    "instance", "strategy", "alpha", "random_p", "seed", "max_time_sec", "max_iters_no_improvement",
+    "obj_cost", "avg_diss_per_emp", "n_covered", "n_uncovered", "min_uncovered_bound",
+    "time_sec", "conv_iter", "iterations_run", "error",
+])
+
+def _make_grasp(I: ThompsonInstance, strategy: str, seed: int, max_time_sec: float,
+                max_iters_no_improvement: int, min_unc: int,
+                profiler: Optional[Profiler] = None) -> ThompsonGRASP:
+    if strategy == "reactive":
+        return ThompsonGRASP(
+            I,
+            max_time_sec=max_time_sec,
+            max_iters_no_improvement=max_iters_no_improvement, # <-- NOVO
+            construction="reactive",
+            alpha_list=ALPHA_LIST_REACT,
+            random_seed=seed,
+            min_uncovered=min_unc,
+            profiler=profiler,
+        )
+    elif strategy == "random_plus_greedy":
+        return ThompsonGRASP(
+            I,
+            max_time_sec=max_time_sec,
+            max_iters_no_improvement=max_iters_no_improvement, # <-- NOVO
+            alpha=ALPHA_TRAD,
+            construction="random_plus_greedy",
+            random_p=RANDOM_P_RPG,
+            random_seed=seed,
+            min_uncovered=min_unc,
+            profiler=profiler,
+        )
+    else:  # traditional
+        return ThompsonGRASP(
+            I,
+            max_time_sec=max_time_sec,
+            max_iters_no_improvement=max_iters_no_improvement, # <-- NOVO
+            alpha=ALPHA_TRAD,
+            construction="traditional",
+            random_seed=seed,
+            min_uncovered=min_unc,
+            profiler=profiler,
+        )
+
+# Instâncias já carregadas neste processo (um processo do pool roda vários jobs)
+_JOB_INSTANCES: Dict[str, Tuple[ThompsonInstance, int]] = {}
+
+def _run_job(job: Tuple[str, str, str, int, float, int, bool, Optional[str], Optional[str]]
+             ) -> Tuple[str, str, int, Optional[Dict[str, object]], str]:
+    """Um job (instância, estratégia, semente). Devolve (instância, estratégia, semente, linha, erro)."""
+    (instance_path, instance_name, strategy, seed,
+     max_time_sec, max_iters_no_improvement, use_cache, cache_dir, profile_dir) = job
+    try:
+        if instance_path not in _JOB_INSTANCES:
+            cache = DerivedCache(cache_dir) if use_cache else None
+            I = load_instance(instance_path, cache=cache)
+            _JOB_INSTANCES[instance_path] = (I, coverage_min_uncovered(I))
+        I, min_unc = _JOB_INSTANCES[instance_path]
+    except AttributeError as exc:
+        return instance_name, strategy, seed, None, (
+            f"Arquivo {os.path.basename(instance_path)} não possui "
+            f"employee_data / shift_data / shift_requirements: {exc}")
+    except ValueError as exc:
+        return instance_name, strategy, seed, None, str(exc)
+    except Exception as exc:
+        # qualquer outra falha fica só neste job; a varredura continua
+        return instance_name, strategy, seed, None, f"{type(exc).__name__}: {exc}"
+
+    try:
+        profiler = None
+        if profile_dir:
+            profiler = Profiler(os.path.join(profile_dir, f"perfil_{instance_name}_{strategy}_{seed}.jsonl"))
+        grasp = _make_grasp(I, strategy, seed, max_time_sec, max_iters_no_improvement, min_unc, profiler)
+
+        t0 = time.time()
+        sol, cost, conv_iter, total_iters = grasp.run()
+        t1 = time.time()
+        elapsed = t1 - t0
+    except Exception as exc:
+        return instance_name, strategy, seed, None, f"{type(exc).__name__}: {exc}"
+
+    total_shifts = len(I.S)
+    n_unalloc = int(cost.comp[0])
+    n_covered = total_shifts - n_unalloc
+    obj_cost = cost.report_value
+
+    if len(I.E) > 0:
+        mean_diss = sum(cost.comp[1:]) / len(I.E)
+    else:
+        mean_diss = 0.0
+
+    row: Dict[str, object] = {
+        "instance": instance_name,
+        "strategy": strategy,
+        "alpha": grasp.alpha if strategy != "reactive" else "",
+        "random_p": grasp.random_p if strategy == "random_plus_greedy" else "",
+        "seed": seed,
+        "max_time_sec": max_time_sec,
+        "max_iters_no_improvement": max_iters_no_improvement, # <-- NOVO (salva no log)
+        "obj_cost": obj_cost,
+        "avg_diss_per_emp": round(mean_diss, 4),
+        "n_covered": n_covered,
+        "n_uncovered": n_unalloc,
+        "min_uncovered_bound": min_unc,
+        "time_sec": round(elapsed, 4),
+        "conv_iter": conv_iter,
+        "iterations_run": total_iters,
+        "error": "",
+    }
+    return instance_name, strategy, seed, row, ""
+
+def _read_csv_rows(path: str) -> Tuple[List[str], List[Dict[str, str]]]:
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return [], []
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        return list(reader.fieldnames or []), list(reader)
+
+def _num(v: object) -> Optional[float]:
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return None
+
+def _row_key(r: Dict[str, object]) -> Tuple[object, ...]:
+    """(instância, estratégia, semente, max_time_sec, max_iters_no_improvement) de uma linha do CSV."""
+    return (r.get("instance"), r.get("strategy"), str(r.get("seed")),
+            _num(r.get("max_time_sec")), _num(r.get("max_iters_no_improvement")))
+
+def _rewrite_csv(path: str, rows: List[Dict[str, str]], fieldnames: List[str]) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp, path)
+
+def _append_csv_row(path: str, row: Dict[str, object], fieldnames: List[str]) -> None:
+    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+        if new_file:
+            writer.writeheader()
+        writer.writerow(row)
+        f.flush()
+
+
 def run_all_instances_and_save_csv(inst_dir: str,
                                    seed: int = 123,
                                    max_time_sec: float = 1800.0,
                                    max_iters_no_improvement: int = 500, # <-- NOVO
-                                   out_csv: str = "resultados_grasp_thompson.csv"):
+                                   out_csv: str = "resultados_grasp_thompson.csv",
+                                   use_cache: bool = True,
+                                   cache_dir: Optional[str] = None,
+                                   seeds: Optional[Sequence[int]] = None,
+                                   n_jobs: int = 1,
+                                   resume: bool = False,
+                                   profile_dir: Optional[str] = None):
     """
-    Varre todos os arquivos .py de instância em inst_dir,
+    Varre todos os arquivos de instância (.nbi ou .py) em inst_dir,
     roda GRASP (3 estratégias) e salva resumo em CSV.
+
+    Com use_cache, o pré-processamento de cada instância (elegibilidade,
+    custos, listas ordenadas) é reaproveitado do cache em disco
+    (cache_dir ou o padrão de precompute_cache.default_cache_dir()).
+
+    Cada (instância, estratégia, semente) é um job; com n_jobs > 1 os jobs
+    rodam num pool de n_jobs processos. Cada linha é gravada em out_csv assim
+    que o job termina; um job que falha grava uma linha com a coluna error
+    preenchida e não interrompe os demais. Sem resume, out_csv é recriado.
+    Com resume, jobs que já têm linha sem erro em out_csv com os mesmos
+    max_time_sec e max_iters_no_improvement são pulados (retoma uma varredura
+    interrompida). Linhas de outra configuração não contam como feitas: ficam
+    no arquivo e geram um aviso. As linhas de erro dos jobs desta varredura
+    saem de out_csv, e esses jobs rodam de novo. Se o cabeçalho de out_csv
+    não tem todas as colunas de RESULT_FIELDS (arquivo de uma versão
+    anterior), ele é reescrito com as colunas novas vazias. O CSV por
+    instância é escrito quando todos os jobs dela terminam.
+
+    Com profile_dir, cada job grava seus tempos/contadores por fase (Profiler)
+    em profile_dir/perfil_<instância>_<estratégia>_<semente>.jsonl.
     """
     if not os.path.isdir(inst_dir):
         raise SystemExit(f"Pasta de instâncias não encontrada: {inst_dir}")
 
     print(f"Lendo instâncias em: {inst_dir}")
 
-    STRATEGIES = ["traditional", "random_plus_greedy", "reactive"]
-    ALPHA_TRAD = 0.25
-    ALPHA_LIST_REACT = [0.0, 0.2, 0.4, 0.6, 0.8, 1.0]
-    RANDOM_P_RPG = 0.30
+    seeds = list(seeds) if seeds is not None else [seed]
 
-    all_rows: List[Dict[str, object]] = []
     out_dir = os.path.dirname(os.path.abspath(out_csv))
     if not os.path.exists(out_dir):
         os.makedirs(out_dir)
 
-    for fname in sorted(os.listdir(inst_dir)):
-        if not fname.endswith(".py"):
-            continue
-
-        instance_path = os.path.join(inst_dir, fname)
+    if resume:
+        fieldnames, old_rows = _read_csv_rows(out_csv)
+    else:
+        fieldnames, old_rows = [], []
+        if os.path.exists(out_csv):
+            os.remove(out_csv)
+    cfg = (_num(max_time_sec), _num(max_iters_no_improvement))
+    done_rows = [r for r in old_rows if not r.get("error") and _row_key(r)[3:] == cfg]
+    done = {_row_key(r) for r in done_rows}
+    n_other = sum(1 for r in old_rows if not r.get("error") and _row_key(r)[3:] != cfg)
+    if n_other:
+        print(f"  [AVISO] {n_other} linha(s) de {out_csv} foram geradas com outros "
+              f"max_time_sec / max_iters_no_improvement: ficam no arquivo, mas não contam "
+              f"como feitas (use resume=False para recomeçar)")
+
+    instance_rows: Dict[str, List[Dict[str, object]]] = {}
+    pending: Dict[str, int] = {}
+    grid = set()
+    jobs = []
+    for fname in list_instance_files(inst_dir):
         instance_name = os.path.splitext(fname)[0]
-
-        print(f"\n=== Instância: {instance_name} ===")
-
-        instance_rows: List[Dict[str, object]] = []
-        instance_csv_path = os.path.join(
-            out_dir, f"resultados_log_{instance_name}.csv"
-        )
-
-        mod = load_instance_module(instance_path)
-
-        try:
-            employee_data = mod.employee_data
-            shift_data = mod.shift_data
-            shift_requirements = mod.shift_requirements
-        except AttributeError as exc:
-            print(f"  [ERRO] Arquivo {fname} não possui "
-                  f"employee_data / shift_data / shift_requirements: {exc}")
-            continue
-
-        I = ThompsonInstance(employee_data, shift_data, shift_requirements)
-        total_shifts = len(I.S)
-
+        instance_rows[instance_name] = [r for r in done_rows if r.get("instance") == instance_name]
         for strategy in STRATEGIES:
-            print(f"  -> Estratégia: {strategy}")
-
-            if strategy == "reactive":
-                grasp = ThompsonGRASP(
-                    I,
-                    max_time_sec=max_time_sec,
-                    max_iters_no_improvement=max_iters_no_improvement, # <-- NOVO
-                    construction="reactive",
-                    alpha_list=ALPHA_LIST_REACT,
-                    random_seed=seed,
-                )
-            elif strategy == "random_plus_greedy":
-                grasp = ThompsonGRASP(
-                    I,
-                    max_time_sec=max_time_sec,
-                    max_iters_no_improvement=max_iters_no_improvement, # <-- NOVO
-                    alpha=ALPHA_TRAD,
-                    construction="random_plus_greedy",
-                    random_p=RANDOM_P_RPG,
-                    random_seed=seed,
-                )
-            else:  # traditional
-                grasp = ThompsonGRASP(
-                    I,
-                    max_time_sec=max_time_sec,
-                    max_iters_no_improvement=max_iters_no_improvement, # <-- NOVO
-                    alpha=ALPHA_TRAD,
-                    construction="traditional",
-                    random_seed=seed,
-                )
-
-            t0 = time.time()
-            sol, cost, conv_iter, total_iters = grasp.run()
-            t1 = time.time()
-            elapsed = t1 - t0
-
-            n_unalloc = int(cost.comp[0])
-            n_covered = total_shifts - n_unalloc
-            obj_cost = cost.report_value
-
-            if len(I.E) > 0:
-                mean_diss = sum(cost.comp[1:]) / len(I.E)
-            else:
-                mean_diss = 0.0
-
-            row: Dict[str, object] = {
-                "instance": instance_name,
-                "strategy": strategy,
-                "alpha": grasp.alpha if strategy != "reactive" else "",
-                "random_p": grasp.random_p if strategy == "random_plus_greedy" else "",
-                "seed": seed,
-                "max_iters_no_improvement": max_iters_no_improvement, # <-- NOVO (salva no log)
-                "obj_cost": obj_cost,
-                "avg_diss_per_emp": round(mean_diss, 4),
-                "n_covered": n_covered,
-                "n_uncovered": n_unalloc,
-                "time_sec": round(elapsed, 4),
-                "conv_iter": conv_iter,
-                "iterations_run": total_iters,
-            }
-
-            all_rows.append(row)
-            instance_rows.append(row)
-
-        _write_csv(
-            instance_csv_path,
-            instance_rows,
-            context_msg=f"Log Instância {instance_name}"
-        )
+            for sd in seeds:
+                key = (instance_name, strategy, str(sd)) + cfg
+                grid.add(key)
+                if key in done:
+                    continue
+                jobs.append((os.path.join(inst_dir, fname), instance_name, strategy, sd,
+                             max_time_sec, max_iters_no_improvement, use_cache, cache_dir,
+                             profile_dir))
+                pending[instance_name] = pending.get(instance_name, 0) + 1
+
+    # erros desta varredura saem do arquivo (o job roda de novo ou já deu certo)
+    kept = [r for r in old_rows if not (r.get("error") and _row_key(r) in grid)]
+    widen = bool(fieldnames) and not set(RESULT_FIELDS) <= set(fieldnames)
+    if widen:
+        # CSV de uma versão anterior: com extrasaction='ignore' as colunas
+        # novas seriam descartadas em silêncio
+        fieldnames = sorted(set(fieldnames) | set(RESULT_FIELDS))
+        print(f"  [LOG] Cabeçalho de {out_csv} ampliado para as colunas atuais")
+    if widen or len(kept) < len(old_rows):
+        _rewrite_csv(out_csv, kept, fieldnames)
+    fieldnames = fieldnames or RESULT_FIELDS
+
+    n_skipped = len(done_rows)
+    if n_skipped:
+        print(f"  [LOG] Retomando: {n_skipped} linha(s) já em {out_csv}")
+    print(f"  [LOG] {len(jobs)} job(s) (instância x estratégia x semente), {n_jobs} processo(s)")
+
+    def _finish(result) -> None:
+        instance_name, strategy, sd, row, err = result
+        if row is None:
+            print(f"  [ERRO] {instance_name} / {strategy} / seed={sd}: {err}")
+            try:
+                _append_csv_row(out_csv, {"instance": instance_name, "strategy": strategy,
+                                          "seed": sd, "max_time_sec": max_time_sec,
+                                          "max_iters_no_improvement": max_iters_no_improvement,
+                                          "error": err}, fieldnames)
+            except IOError as e:
+                print(f"  [ERRO] Falha ao gravar linha em {out_csv}: {e}")
+        else:
+            print(f"  -> {instance_name} / {strategy} / seed={sd}: "
+                  f"obj={row['obj_cost']:.2f} ({row['time_sec']}s)")
+            try:
+                _append_csv_row(out_csv, row, fieldnames)
+            except IOError as e:
+                print(f"  [ERRO] Falha ao gravar linha em {out_csv}: {e}")
+            instance_rows[instance_name].append(row)
+        pending[instance_name] -= 1
+        if pending[instance_name] == 0:
+            _write_csv(
+                os.path.join(out_dir, f"resultados_log_{instance_name}.csv"),
+                instance_rows[instance_name],
+                context_msg=f"Log Instância {instance_name}"
+            )
+
+    if n_jobs > 1 and len(jobs) > 1:
+        with mp.get_context().Pool(n_jobs) as pool:
+            for result in pool.imap_unordered(_run_job, jobs):
+                _finish(result)
+    else:
+        for job in jobs:
+            _finish(_run_job(job))
 
-    if not all_rows:
+    if not jobs and not done_rows:
         print("\nNenhuma instância/resultado gerado. Verifique a pasta.")
         return
-
-    _write_csv(
-        out_csv,
-        all_rows,
-        context_msg="Resumo Geral"
-    )
+    print(f"  [LOG] Resumo Geral: Resultados salvos em: {out_csv}")
 
 # =========================
 # Execução como script
@@ -646,4 +2088,5 @@ if __name__ == "__main__":
             max_time_sec=1800.0,
             max_iters_no_improvement=500, # <-- NOVO (define o limite de convergência)
             out_csv=OUT_CSV,
+            n_jobs=os.cpu_count() or 1,   # um job (instância, estratégia, semente) por núcleo
         )
\ No newline at end of file
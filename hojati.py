@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+Heurística de duas fases de Hojati (2010), baseada em PL.
+
+Fase 1: o máximo de ocorrências cobertas vem do fluxo máximo
+(coverage_bound.py); U* = |S| - fluxo é o ótimo do nível 0.
+
+Fase 2: os empregados são processados em ordem de senioridade. Para o
+empregado e, resolve-se um PL sobre a rede residual
+
+    min  sum_s v_es x_es
+    s.a. cobertura (2), carga (4) e um turno por dia (5) dos empregados ainda
+         não fixados, sum_s u[s] = U*, e os arcos dos já fixados nos seus valores
+
+e os turnos de e no ótimo são fixados antes de passar ao próximo. Sem as
+linhas de senioridade (6)/(7) a matriz é totalmente unimodular (cobertura
+de um lado; carga e dia formam uma família laminar por empregado do outro),
+logo o vértice ótimo já é 0/1. Se o PL devolver algo fracionário, o passo é
+refeito como MIP.
+
+O PL é carregado uma vez num backend de lex_mip.py (relax=True): cada
+passo só troca o objetivo e fixa colunas, e highspy/gurobi reotimizam a
+partir da base anterior. A solução do passo anterior continua viável: se
+nela o custo de e já é 0 (o limite inferior), e é fixado sem resolver nada.
+
+Como o GRASP, a heurística não impõe (6)/(7); o resultado é comparável com
+lex_cost do GRASP e pode ser refinado pela busca local dele (polish_time).
+Fica entre o GRASP e o lexicográfico exato (lex_mip.py): cada empregado vê o
+ótimo dele dado os mais seniores, mas sem reexaminar empates.
+
+Uso como script:
+    python hojati.py generated_instances/instancia_X.py [--backend highs] [--polish 5]
+"""
+from __future__ import annotations
+import os, time, random, argparse
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from grasp_thompson_new3 import (ThompsonInstance, ThompsonSolution, LexCost, LocalSearch,
+                                 solution_from_assign, lex_cost)
+from coverage_bound import coverage_bound
+from lex_mip import BACKENDS, build_formulation, make_backend, assign_from_values
+
+
+@dataclass
+class HojatiResult:
+    sol: ThompsonSolution
+    cost: LexCost
+    runtime: float
+    backend: str
+    min_uncovered: int      # U* da fase 1
+    n_lp: int               # PLs resolvidos na fase 2
+    n_mip: int              # passos refeitos como MIP (PL fracionário)
+    n_skipped: int          # empregados fixados sem PL (custo 0 já atingido)
+    timed_out: bool = False # max_time_sec estourou; o resto ficou na solução corrente
+
+
+def _cheapest_days(I: ThompsonInstance, occs: np.ndarray, costs: np.ndarray,
+                   k: int) -> Optional[np.ndarray]:
+    """As k ocorrências mais baratas de occs com no máximo uma por dia (None se não há k dias)."""
+    if k <= 0:
+        return occs[:0]
+    if len(occs) < k:
+        return None
+    order = np.lexsort((costs, I.day_occ[occs]))         # por dia, custo crescente
+    days = I.day_occ[occs[order]]
+    first = order[np.r_[True, days[1:] != days[:-1]]]     # a mais barata de cada dia
+    best = first[np.argsort(costs[first], kind='stable')][:k]
+    return occs[best] if len(best) == k else None
+
+
+def hojati_two_phase(I: ThompsonInstance, backend: str = 'auto',
+                     max_time_sec: Optional[float] = None, polish_time: float = 0.0,
+                     rng: Optional[random.Random] = None, tol: float = 1e-6,
+                     threads: Optional[int] = None, verbose: bool = False) -> HojatiResult:
+    """
+    backend: nome em lex_mip.BACKENDS (ou 'auto'); o PL é carregado uma vez e
+    cada passo só troca o objetivo e fixa colunas, então highspy/gurobi
+    reotimizam a partir da base anterior. max_time_sec limita a fase 2: ao
+    estourar, os empregados restantes ficam com os turnos da solução corrente
+    (que é viável).
+    """
+    t0 = time.perf_counter()
+    nE, nS = I.n_emp, I.n_occ
+
+    # --- Fase 1: cobertura máxima (fluxo) ---
+    form = build_formulation(I, seniority_link=False)     # sum u = U* já está em A
+    lp = make_backend(backend, form, threads=threads, relax=True)
+    y = np.arange(form.y_cols().start, form.n_var)
+    lp.fix_vars(y, 0.0, 0.0)                               # y não aparece sem (6)/(7)
+    lb = np.zeros(form.n_var)
+    ub = np.ones(form.n_var)
+    ub[y] = 0.0
+    cur = coverage_bound(I).assign                         # solução corrente (viável)
+    need = nS - form.cover_lb                              # a cobrir pelos não fixados
+    free_emp = np.ones(nE, dtype=bool)
+    free_occ = np.ones(nS, dtype=bool)
+    # arcos por ocorrência: ao fixar s num empregado, os demais arcos de s e
+    # u[s] ficam em 0 (a linha de cobertura já obriga; fixar encolhe o PL)
+    by_occ = np.argsort(form.arc_s, kind='stable')
+    occ_ptr = np.searchsorted(form.arc_s[by_occ], np.arange(nS + 1))
+    u0 = form.u_cols().start
+
+    # --- Fase 2: um passo por empregado, em ordem de senioridade ---
+    n_lp = n_mip = n_skipped = 0
+    timed_out = False
+    for e in range(nE):
+        lo_a, hi_a = form.ptr[e], form.ptr[e + 1]
+        free_emp[e] = False
+        if hi_a == lo_a:
+            continue
+        lv = form.levels[e + 1]
+        occs, costs = form.arc_s[lo_a:hi_a], lv.coef
+        mine = cur[occs] == e
+        if max_time_sec is not None and time.perf_counter() - t0 > max_time_sec:
+            timed_out = True
+            take = occs[mine]
+        elif float(costs[mine].sum()) <= tol:
+            # custo 0 na solução corrente: já é o ótimo de e
+            take = occs[mine]
+            n_skipped += 1
+        else:
+            # limite inferior: e precisa cobrir ao menos k ocorrências (o que os
+            # demais não cobrem) e o melhor possível são os k dias mais baratos;
+            # se os demais cobrem o resto com essa escolha, ela é ótima sem PL.
+            avail = free_occ[occs]
+            rest = coverage_bound(I, emp_mask=free_emp, occ_mask=free_occ)
+            k = need - rest.max_covered
+            take = _cheapest_days(I, occs[avail], costs[avail], k)
+            if take is not None:
+                occ_mask = free_occ.copy()
+                occ_mask[take] = False
+                rest = rest if k == 0 else coverage_bound(I, emp_mask=free_emp, occ_mask=occ_mask)
+                if rest.max_covered >= need - k:
+                    n_skipped += 1
+                    cur = np.where(free_occ, rest.assign, cur)
+                    cur[take] = e
+                else:
+                    take = None
+            if take is None:
+                lp.set_objective(lv.idx, lv.coef)
+                r = lp.solve()
+                n_lp += 1
+                if r.z is None:
+                    raise RuntimeError(f"PL sem solução no empregado {I.E[e]} (status {r.status})")
+                z = r.z
+                xe = z[lo_a:hi_a]
+                if np.abs(xe - np.round(xe)).max() > tol:
+                    # não deveria ocorrer (matriz TU): refaz o passo como MIP no
+                    # mesmo backend, com as colunas já fixadas no PL
+                    mip = make_backend(lp.name, form, threads=threads, relax=False)
+                    fixed = lb == ub
+                    mip.fix_vars(np.flatnonzero(fixed & (ub > 0.5)), 1.0, 1.0)
+                    mip.fix_vars(np.flatnonzero(fixed & (ub <= 0.5)), 0.0, 0.0)
+                    mip.set_objective(lv.idx, lv.coef)
+                    left = None if max_time_sec is None else max(0.0, max_time_sec - (time.perf_counter() - t0))
+                    r = mip.solve(time_limit=left)
+                    n_mip += 1
+                    if r.z is None:
+                        raise RuntimeError(f"MIP sem solução no empregado {I.E[e]} (status {r.status})")
+                    z = r.z
+                cur = assign_from_values(form, np.round(z))
+                take = occs[cur[occs] == e]
+
+        # fixa e em take; as outras colunas de e, os demais arcos de take e u[take] vão a 0
+        arcs = np.arange(lo_a, hi_a)
+        chosen = np.isin(occs, take)
+        on, off = arcs[chosen], arcs[~chosen]
+        others = np.concatenate([by_occ[occ_ptr[s]:occ_ptr[s + 1]] for s in take.tolist()] + [u0 + take])
+        others = others[(lb[others] < ub[others]) & ((others < lo_a) | (others >= hi_a))]
+        off = np.concatenate([off, others])
+        if len(on):
+            lp.fix_vars(on, 1.0, 1.0)
+        if len(off):
+            lp.fix_vars(off, 0.0, 0.0)
+        lb[on] = ub[on] = 1.0
+        lb[off] = ub[off] = 0.0
+        free_occ[take] = False
+        need -= len(take)
+        if verbose:
+            print(f"  [HOJATI] {I.E[e]}: insatisfação {float(costs[chosen].sum()):.2f}")
+
+    sol = solution_from_assign(I, cur.tolist())
+    if polish_time > 0:
+        ls = LocalSearch(I, min_uncovered=form.cover_lb)
+        sol = ls.improve(sol, rng or random.Random(0), deadline=time.perf_counter() + polish_time)
+
+    return HojatiResult(sol=sol, cost=lex_cost(I, sol), runtime=time.perf_counter() - t0,
+                        backend=lp.name, min_uncovered=form.cover_lb, n_lp=n_lp, n_mip=n_mip,
+                        n_skipped=n_skipped, timed_out=timed_out)
+
+
+# =========================
+# Execução como script
+# =========================
+if __name__ == "__main__":
+    from grasp_thompson_new3 import load_instance, summarize_solution
+    from precompute_cache import DerivedCache
+
+    ap = argparse.ArgumentParser(description="Heurística de duas fases de Hojati (2010).")
+    ap.add_argument('instance', help="instancia_*.py ou .nbi")
+    ap.add_argument('--backend', default='auto', help=f"auto, {', '.join(BACKENDS)}")
+    ap.add_argument('--time-limit', type=float, default=None, help="limite da fase 2 (s)")
+    ap.add_argument('--polish', type=float, default=0.0, help="segundos de busca local do GRASP no final")
+    ap.add_argument('--verbose', action='store_true')
+    args = ap.parse_args()
+
+    I = load_instance(args.instance, cache=DerivedCache(), require_candidates=False)
+    r = hojati_two_phase(I, backend=args.backend, max_time_sec=args.time_limit,
+                         polish_time=args.polish, verbose=args.verbose)
+    print(f"[{os.path.basename(args.instance)}] backend={r.backend} tempo={r.runtime:.2f}s "
+          f"U*={r.min_uncovered} PLs={r.n_lp} MIPs={r.n_mip} sem_PL={r.n_skipped}"
+          + (" (limite de tempo)" if r.timed_out else ""))
+    print(summarize_solution(I, r.sol, r.cost).replace("(GRASP)", "(Hojati)"))
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+Formato binário de instância (.nbi) com leitura via mmap.
+
+As instâncias `instancia_*.py` são código Python: carregá-las exige compilar
+e executar o módulo só para obter três dicionários. Aqui as mesmas tabelas
+(empregados, modelos de turno e requisitos por dia) ficam em arrays de
+layout fixo, precedidos por um cabeçalho JSON:
+
+    [0:8)      magic b'NBTELI01'
+    [8:16)     tamanho H do cabeçalho JSON (uint64, little-endian)
+    [16:16+H)  cabeçalho JSON (utf-8): ids, dias, meta e a descrição de
+               cada array {"name", "dtype", "shape", "offset"}
+    ...        arrays crus, cada um alinhado em ALIGN bytes
+
+O leitor mapeia o arquivo uma única vez (np.memmap) e devolve visões sobre
+ele, sem materializar dicionários.
+
+Uso como script (converte as pastas de instâncias existentes):
+    python instance_format.py generated_instances instancias_novas
+"""
+from __future__ import annotations
+import os, sys, json, importlib.util
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple, Optional
+
+import numpy as np
+
+MAGIC = b'NBTELI01'
+ALIGN = 64
+EXT = '.nbi'
+DAYS = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
+
+# Ordem fixa dos arrays no arquivo
+ARRAY_NAMES = [
+    'emp_st', 'emp_ll', 'emp_es', 'emp_ls', 'emp_cap', 'emp_unav',
+    'emp_skill_ptr', 'emp_skill',
+    'shift_ids', 'shift_st', 'shift_bl', 'shift_tt',
+    'req_tpl', 'req_day',
+]
+
+
+def emp_sort_key(e: str) -> int:
+    # 'E-01' -> 1 (E-01 é o mais sênior)
+    return int(e.split('-')[1])
+
+
+def _num_array(values) -> np.ndarray:
+    """int64 se todos os valores forem inteiros, senão float64 (preserva o tipo original)."""
+    if all(isinstance(v, (int, np.integer)) and not isinstance(v, bool) for v in values):
+        return np.array(values, dtype=np.int64)
+    return np.array(values, dtype=np.float64)
+
+
+# =========================
+# Tabelas da instância
+# =========================
+@dataclass
+class InstanceTables:
+    """
+    Tabelas de uma instância em arrays. Empregados em ordem de senioridade;
+    ocorrências (dia, turno) na ordem de shift_requirements.
+    """
+    days: List[str]
+    emp_ids: List[str]
+    emp_st: np.ndarray
+    emp_ll: np.ndarray
+    emp_es: np.ndarray
+    emp_ls: np.ndarray
+    emp_cap: np.ndarray          # MxWk
+    emp_unav: np.ndarray         # bitmask uint8: bit j => days[j] indisponível
+    emp_skill_ptr: np.ndarray    # CSR das habilidades (SklTyp)
+    emp_skill: np.ndarray
+    shift_ids: np.ndarray        # modelos de turno (shift_data)
+    shift_st: np.ndarray
+    shift_bl: np.ndarray
+    shift_tt: np.ndarray
+    req_tpl: np.ndarray          # ocorrência -> linha do modelo de turno
+    req_day: np.ndarray          # ocorrência -> índice em days
+    req_days: List[str]          # chaves de shift_requirements, na ordem original
+    meta: dict = field(default_factory=dict)
+
+    @property
+    def n_emp(self) -> int:
+        return len(self.emp_ids)
+
+    @property
+    def n_occ(self) -> int:
+        return len(self.req_tpl)
+
+    def to_dicts(self) -> Tuple[Dict[str, dict], Dict[int, dict], Dict[str, List[int]]]:
+        """Reconstrói (employee_data, shift_data, shift_requirements) no formato dos .py."""
+        employee_data = {}
+        ptr, sk = self.emp_skill_ptr.tolist(), self.emp_skill.tolist()
+        unav = self.emp_unav.tolist()
+        for i, e in enumerate(self.emp_ids):
+            employee_data[e] = {
+                'ST': self.emp_st[i].item(), 'LL': self.emp_ll[i].item(),
+                'ES': self.emp_es[i].item(), 'LS': self.emp_ls[i].item(),
+                'SklTyp': sk[ptr[i]:ptr[i + 1]],
+                'MxWk': self.emp_cap[i].item(),
+                'UnDay': [d for j, d in enumerate(self.days) if unav[i] >> j & 1],
+            }
+        shift_data = {
+            sid: {'ST': st, 'BL': bl, 'TT': tt}
+            for sid, st, bl, tt in zip(self.shift_ids.tolist(), self.shift_st.tolist(),
+                                       self.shift_bl.tolist(), self.shift_tt.tolist())
+        }
+        shift_requirements: Dict[str, List[int]] = {d: [] for d in self.req_days}
+        sids = self.shift_ids[self.req_tpl].tolist()
+        for d, sid in zip(self.req_day.tolist(), sids):
+            shift_requirements[self.days[d]].append(sid)
+        return employee_data, shift_data, shift_requirements
+
+
+def tables_from_dicts(employee_data: Dict[str, dict],
+                      shift_data: Dict[int, dict],
+                      shift_requirements: Dict[str, List[int]],
+                      meta: Optional[dict] = None) -> InstanceTables:
+    days = list(DAYS)
+    day_pos = {d: j for j, d in enumerate(days)}
+    E = sorted(employee_data.keys(), key=emp_sort_key)
+    emp = [employee_data[e] for e in E]
+
+    skills = [list(v['SklTyp']) for v in emp]
+    skill_ptr = np.zeros(len(E) + 1, dtype=np.int64)
+    skill_ptr[1:] = np.cumsum([len(s) for s in skills])
+    unav = np.zeros(len(E), dtype=np.uint8)
+    for i, v in enumerate(emp):
+        for d in v['UnDay']:
+            unav[i] |= 1 << day_pos[d]
+
+    shift_ids = list(shift_data.keys())
+    tpl_pos = {sid: r for r, sid in enumerate(shift_ids)}
+    occ = [(day_pos[d], tpl_pos[sid]) for d, ids in shift_requirements.items() for sid in ids]
+
+    return InstanceTables(
+        days=days,
+        emp_ids=E,
+        emp_st=_num_array([v['ST'] for v in emp]),
+        emp_ll=_num_array([v['LL'] for v in emp]),
+        emp_es=_num_array([v['ES'] for v in emp]),
+        emp_ls=_num_array([v['LS'] for v in emp]),
+        emp_cap=np.array([v['MxWk'] for v in emp], dtype=np.int32),
+        emp_unav=unav,
+        emp_skill_ptr=skill_ptr,
+        emp_skill=np.array([c for s in skills for c in s], dtype=np.int64),
+        shift_ids=np.array(shift_ids, dtype=np.int64),
+        shift_st=_num_array([shift_data[sid]['ST'] for sid in shift_ids]),
+        shift_bl=_num_array([shift_data[sid]['BL'] for sid in shift_ids]),
+        shift_tt=np.array([shift_data[sid]['TT'] for sid in shift_ids], dtype=np.int64),
+        req_tpl=np.array([t for _, t in occ], dtype=np.int32),
+        req_day=np.array([d for d, _ in occ], dtype=np.int8),
+        req_days=list(shift_requirements.keys()),
+        meta=dict(meta or {}),
+    )
+
+
+# =========================
+# Escrita / leitura do .nbi
+# =========================
+def _align(n: int) -> int:
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_instance(path: str, tables: InstanceTables) -> None:
+    arrays = [np.ascontiguousarray(getattr(tables, name)) for name in ARRAY_NAMES]
+    descr = []
+    header = {
+        'version': 1,
+        'days': tables.days,
+        'emp_ids': tables.emp_ids,
+        'req_days': tables.req_days,
+        'meta': tables.meta,
+        'arrays': descr,
+    }
+    # Os offsets dependem do tamanho do próprio cabeçalho: calcula com
+    # offsets provisórios e repete até estabilizar.
+    base = 0
+    while True:
+        descr.clear()
+        off = base
+        for name, a in zip(ARRAY_NAMES, arrays):
+            descr.append({'name': name, 'dtype': a.dtype.str, 'shape': list(a.shape), 'offset': off})
+            off = _align(off + a.nbytes)
+        raw = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        new_base = _align(16 + len(raw))
+        if new_base == base:
+            break
+        base = new_base
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(raw).to_bytes(8, 'little'))
+        f.write(raw)
+        for d, a in zip(descr, arrays):
+            f.write(b'\0' * (d['offset'] - f.tell()))
+            f.write(a.tobytes())
+    os.replace(tmp, path)
+
+
+def read_instance(path: str) -> InstanceTables:
+    """Lê um .nbi; os arrays são visões somente-leitura sobre um único mmap do arquivo."""
+    with open(path, 'rb') as f:
+        if f.read(8) != MAGIC:
+            raise ValueError(f"{path}: não é um arquivo de instância {EXT}")
+        hlen = int.from_bytes(f.read(8), 'little')
+        header = json.loads(f.read(hlen).decode('utf-8'))
+
+    mm = np.memmap(path, dtype=np.uint8, mode='r')
+    arrays = {}
+    for d in header['arrays']:
+        dt = np.dtype(d['dtype'])
+        n = int(np.prod(d['shape'], dtype=np.int64)) * dt.itemsize
+        arrays[d['name']] = mm[d['offset']:d['offset'] + n].view(dt).reshape(d['shape'])
+
+    return InstanceTables(days=header['days'], emp_ids=header['emp_ids'],
+                          req_days=header['req_days'], meta=header.get('meta', {}),
+                          **arrays)
+
+
+# =========================
+# Conversão das instâncias .py existentes
+# =========================
+def load_instance_module(path: str):
+    module_name = os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"Não foi possível carregar a especificação para {path}")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def convert_py_instance(py_path: str, out_path: Optional[str] = None) -> str:
+    mod = load_instance_module(py_path)
+    tables = tables_from_dicts(mod.employee_data, mod.shift_data, mod.shift_requirements,
+                               meta={'source': os.path.basename(py_path)})
+    out_path = out_path or os.path.splitext(py_path)[0] + EXT
+    write_instance(out_path, tables)
+    return out_path
+
+
+def convert_directory(src_dir: str, dst_dir: Optional[str] = None) -> List[str]:
+    """Converte todo `instancia_*.py` de src_dir para .nbi (em dst_dir, ou ao lado do .py)."""
+    dst_dir = dst_dir or src_dir
+    os.makedirs(dst_dir, exist_ok=True)
+    written = []
+    for fname in sorted(os.listdir(src_dir)):
+        if not (fname.startswith('instancia') and fname.endswith('.py')):
+            continue
+        out = os.path.join(dst_dir, os.path.splitext(fname)[0] + EXT)
+        try:
+            written.append(convert_py_instance(os.path.join(src_dir, fname), out))
+            print(f"  [LOG] {fname} -> {out}")
+        except AttributeError as exc:
+            print(f"  [ERRO] {fname} não possui employee_data / shift_data / shift_requirements: {exc}")
+    return written
+
+
+if __name__ == "__main__":
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+    dirs = sys.argv[1:] or ['generated_instances', 'instancias_novas']
+    for d in dirs:
+        path = d if os.path.isabs(d) else os.path.join(BASE_DIR, d)
+        if not os.path.isdir(path):
+            print(f"ERRO: pasta de instâncias não encontrada: {path}")
+            continue
+        print(f"Convertendo instâncias em: {path}")
+        convert_directory(path)
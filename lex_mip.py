@@ -0,0 +1,927 @@
+# -*- coding: utf-8 -*-
+"""
+Formulação de Hojati/Thompson independente de solver + objetivo lexicográfico.
+
+new_model.py, newattempt.py e Gurobi/new_model_big.py só rodam com gurobipy
+(e licença). Aqui o modelo é escrito uma única vez como matriz esparsa sobre
+o vetor de variáveis
+
+    z = [ x (arcos elegíveis (e, s), em ordem de empregado) | u (S) | y (E) ]
+
+todas binárias, com linhas lo <= A z <= hi:
+
+    (2) cobertura          sum_e x[e,s] + u[s] = 1
+    (3) pelo menos um      sum_s x[e,s] >= 1                      (opcional)
+    (4) carga máxima       sum_s x[e,s] <= m_e
+    (5) um turno por dia   sum_{s no dia d} x[e,s] <= 1
+    (6)/(7) senioridade    sum_s x[e,s] - (m_e-1) y[e-1] <= 1
+                           m_e y[e] - sum_s x[e,s] <= 0           (opcional)
+        limite do nível 0  sum_s u[s] >= LB  (fluxo máximo, coverage_bound.py)
+
+Os níveis do objetivo (não alocados e, depois, a insatisfação de cada
+empregado em ordem de senioridade) são resolvidos em sequência por
+solve_lexicographic: minimiza o nível k, fixa "nível k <= ótimo" como linha
+e passa ao k+1. A sequência só usa a interface MipBackend, então funciona
+igual com qualquer solver:
+
+    'gurobi'  gurobipy (quando há licença)
+    'highs'   highspy
+    'cbc'     PuLP + CBC
+    'scipy'   scipy.optimize.milp (HiGHS embutido no SciPy; sem dependência
+              extra, mas remonta o modelo a cada nível)
+
+highs (highspy 1.15), cbc (PuLP 3.3 + CBC) e scipy resolvem a sequência
+completa do Baseline (74 níveis, todos provados) com o mesmo vetor de
+níveis. O backend 'gurobi' NÃO foi executado (sem licença): só entra quando
+pedido pelo nome, nunca por 'auto'. O teste de equivalência compara cada
+backend instalado com o scipy: MIP nível a nível e a relaxação com
+reotimização, que é o caminho usado por hojati.py. Os backends ausentes são
+pulados. Rode-o antes de confiar num backend ou numa versão nova de solver:
+    python lex_mip.py generated_instances/instancia_Grupo0_Artigo_Thompson_Baseline.py --smoke
+
+Sem as linhas (3) e (6)/(7) o limite de fluxo máximo É o ótimo do nível 0;
+nesse caso o nível 0 é fixado direto em LB, sem resolver nenhum MIP.
+
+Em vez de len(E)+1 objetivos hierárquicos num só optimize() (setObjectiveN),
+cada nível é um solve próprio, com teto de tempo/gap por nível, MIP start
+vindo do nível anterior e fixação de colunas dominadas; level_report mostra
+quanto tempo cada nível de senioridade custou.
+
+Uso como script (compara backends na mesma instância):
+    python lex_mip.py generated_instances/instancia_X.py --backend highs cbc
+"""
+from __future__ import annotations
+import os, csv, json, time, argparse
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, TYPE_CHECKING
+
+import numpy as np
+import scipy.sparse as sp
+
+from coverage_bound import coverage_bound
+
+if TYPE_CHECKING:
+    from grasp_thompson_new3 import ThompsonInstance
+
+
+# =========================
+# Formulação
+# =========================
+@dataclass
+class LexLevel:
+    name: str
+    idx: np.ndarray         # colunas de z com coeficiente no nível
+    coef: np.ndarray
+
+
+@dataclass
+class Formulation:
+    I: "ThompsonInstance"
+    arc_e: np.ndarray
+    arc_s: np.ndarray
+    ptr: np.ndarray         # arcos de e: ptr[e]:ptr[e+1]
+    n_var: int
+    A: sp.csr_matrix
+    lo: np.ndarray
+    hi: np.ndarray
+    rows: Dict[str, slice]  # família -> linhas de A
+    levels: List[LexLevel]
+    cover_lb: int
+    level0_exact: bool      # LB é o ótimo do nível 0 (já fixado em A)
+
+    @property
+    def n_arc(self) -> int:
+        return len(self.arc_e)
+
+    def x_cols(self) -> slice:
+        return slice(0, self.n_arc)
+
+    def u_cols(self) -> slice:
+        return slice(self.n_arc, self.n_arc + self.I.n_occ)
+
+    def y_cols(self) -> slice:
+        return slice(self.n_arc + self.I.n_occ, self.n_var)
+
+
+def build_formulation(I: "ThompsonInstance", atleast_one: bool = False,
+                      seniority_link: bool = True) -> Formulation:
+    """Monta A, lo, hi e os níveis lexicográficos a partir de I.elig (sem laço por linha)."""
+    nE, nS, nD = I.n_emp, I.n_occ, len(I.days)
+    m_e = I.cap_emp.astype(np.float64)
+
+    arc_e, arc_s = np.nonzero(I.elig)
+    nA = len(arc_e)
+    arc = np.arange(nA)
+    ones = np.ones(nA)
+    v = I.V[arc_e, arc_s].astype(np.float64)
+    ptr = np.searchsorted(arc_e, np.arange(nE + 1))
+    n_var = nA + nS + nE
+    u0, y0 = nA, nA + nS
+
+    A_load = sp.csr_matrix((ones, (arc_e, arc)), shape=(nE, n_var))
+    ed_keys, ed_row = np.unique(arc_e * nD + I.day_occ[arc_s], return_inverse=True)
+
+    cov = coverage_bound(I)
+    level0_exact = not atleast_one and not seniority_link
+
+    blocks = []     # (nome, A, lo, hi)
+    blocks.append(('cover',
+                   sp.csr_matrix((np.ones(nA + nS),
+                                  (np.concatenate([arc_s, np.arange(nS)]),
+                                   np.concatenate([arc, u0 + np.arange(nS)]))),
+                                 shape=(nS, n_var)),
+                   np.ones(nS), np.ones(nS)))
+    if atleast_one:
+        blocks.append(('atleast1', A_load, np.ones(nE), np.full(nE, np.inf)))
+    blocks.append(('max', A_load, np.full(nE, -np.inf), m_e))
+    blocks.append(('oneday', sp.csr_matrix((ones, (ed_row, arc)), shape=(len(ed_keys), n_var)),
+                   np.full(len(ed_keys), -np.inf), np.ones(len(ed_keys))))
+    if seniority_link and nE > 1:
+        k = np.arange(nE - 1)
+        # (6) linha k <-> empregado k+1, y do anterior (k)
+        Y_up = sp.csr_matrix((1 - m_e[1:], (k, y0 + k)), shape=(nE - 1, n_var))
+        blocks.append(('seniority_up', A_load[1:] + Y_up,
+                       np.full(nE - 1, -np.inf), np.ones(nE - 1)))
+        # (7) linha k <-> empregado k
+        Y_flag = sp.csr_matrix((m_e[:-1], (k, y0 + k)), shape=(nE - 1, n_var))
+        blocks.append(('seniority_flag', Y_flag - A_load[:-1],
+                       np.full(nE - 1, -np.inf), np.zeros(nE - 1)))
+    lb = float(cov.min_uncovered)
+    blocks.append(('cover_lb', sp.csr_matrix((np.ones(nS), (np.zeros(nS, dtype=np.int64), u0 + np.arange(nS))),
+                                             shape=(1, n_var)),
+                   np.array([lb]), np.array([lb if level0_exact else np.inf])))
+
+    rows, r = {}, 0
+    for name, B, _, _ in blocks:
+        rows[name] = slice(r, r + B.shape[0])
+        r += B.shape[0]
+    A = sp.vstack([B for _, B, _, _ in blocks], format='csr')
+    lo = np.concatenate([b[2] for b in blocks])
+    hi = np.concatenate([b[3] for b in blocks])
+
+    levels = [LexLevel('unallocated', u0 + np.arange(nS), np.ones(nS))]
+    for e in range(nE):
+        levels.append(LexLevel(f"diss_{I.E[e]}", np.arange(ptr[e], ptr[e + 1]), v[ptr[e]:ptr[e + 1]]))
+
+    return Formulation(I=I, arc_e=arc_e, arc_s=arc_s, ptr=ptr, n_var=n_var,
+                       A=A, lo=lo, hi=hi, rows=rows, levels=levels,
+                       cover_lb=cov.min_uncovered, level0_exact=level0_exact)
+
+
+def assign_from_values(form: Formulation, z: np.ndarray) -> np.ndarray:
+    """Vetor z -> ocorrência -> empregado (-1 = não alocada)."""
+    assign = np.full(form.I.n_occ, -1, dtype=np.int64)
+    on = np.flatnonzero(z[form.x_cols()] > 0.5)
+    assign[form.arc_s[on]] = form.arc_e[on]
+    return assign
+
+
+def values_from_assign(form: Formulation, assign) -> np.ndarray:
+    """Ocorrência -> empregado (ex.: solução do GRASP) -> vetor z, para MIP start."""
+    I = form.I
+    assign = np.asarray(assign, dtype=np.int64)
+    z = np.zeros(form.n_var)
+    col = {(e, s): a for a, (e, s) in enumerate(zip(form.arc_e.tolist(), form.arc_s.tolist()))}
+    occ = np.flatnonzero(assign >= 0)
+    z[[col[int(assign[s]), int(s)] for s in occ]] = 1.0
+    z[form.u_cols()] = assign < 0
+    load = np.bincount(assign[occ], minlength=I.n_emp)
+    z[form.y_cols()] = load >= I.cap_emp
+    return z
+
+
+def level_values(form: Formulation, z: np.ndarray) -> np.ndarray:
+    return np.array([float(lv.coef @ z[lv.idx]) for lv in form.levels])
+
+
+# =========================
+# Backends
+# =========================
+@dataclass
+class SolveResult:
+    status: str             # 'optimal' | 'time_limit' | 'infeasible' | 'error'
+    obj: Optional[float]
+    bound: Optional[float]
+    z: Optional[np.ndarray]
+    runtime: float
+
+
+class MipBackend(ABC):
+    """
+    Interface mínima usada por solve_lexicographic. O modelo (form.A) é
+    carregado no construtor; depois só trocam o objetivo, entram linhas novas
+    e colunas são fixadas (limites [lo, hi]). relax=True carrega a relaxação
+    linear (colunas contínuas em [0, 1]), reotimizada a partir da base
+    anterior nos solvers incrementais (ex.: hojati.py).
+    """
+    name = ''
+
+    def __init__(self, form: Formulation, threads: Optional[int] = None, verbose: bool = False,
+                 relax: bool = False):
+        self.form = form
+        self.threads = threads
+        self.verbose = verbose
+        self.relax = relax
+
+    @staticmethod
+    @abstractmethod
+    def available() -> bool:
+        ...
+
+    @abstractmethod
+    def set_objective(self, idx: np.ndarray, coef: np.ndarray) -> None:
+        ...
+
+    @abstractmethod
+    def add_row(self, idx: np.ndarray, coef: np.ndarray, lo: float, hi: float, name: str) -> None:
+        ...
+
+    @abstractmethod
+    def fix_vars(self, idx: np.ndarray, lo: float, hi: float) -> None:
+        ...
+
+    def set_start(self, z: np.ndarray) -> None:
+        """MIP start para o próximo solve; backends sem suporte ignoram."""
+
+    @abstractmethod
+    def solve(self, time_limit: Optional[float] = None, mip_gap: Optional[float] = None) -> SolveResult:
+        ...
+
+
+class GurobiBackend(MipBackend):
+    """Não executado (sem licença): rode smoke_check (--smoke) antes de usar."""
+    name = 'gurobi'
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            import gurobipy as gp
+            env = gp.Env(empty=True)
+            env.setParam('OutputFlag', 0)
+            env.start()         # falha sem licença
+            env.dispose()
+            return True
+        except Exception:
+            return False
+
+    def __init__(self, form: Formulation, threads: Optional[int] = None, verbose: bool = False,
+                 relax: bool = False):
+        super().__init__(form, threads, verbose, relax)
+        import gurobipy as gp
+        from gurobipy import GRB
+        self.GRB = GRB
+        m = gp.Model("Thompson_lex")
+        m.Params.OutputFlag = int(verbose)
+        if threads:
+            m.Params.Threads = threads
+        self.z = m.addMVar(form.n_var, vtype=GRB.CONTINUOUS if relax else GRB.BINARY, name="z")
+        A, lo, hi = form.A, form.lo, form.hi
+        eq = lo == hi
+        le = ~eq & np.isfinite(hi)
+        ge = ~eq & np.isfinite(lo)
+        m.addConstr(A[eq] @ self.z == hi[eq], name="eq")
+        m.addConstr(A[le] @ self.z <= hi[le], name="le")
+        m.addConstr(A[ge] @ self.z >= lo[ge], name="ge")
+        m.ModelSense = GRB.MINIMIZE
+        self.m = m
+        self.gap_default = m.Params.MIPGap      # o modelo é reusado entre níveis
+        self.lb = np.zeros(form.n_var)
+        self.ub = np.ones(form.n_var)
+
+    def set_objective(self, idx, coef):
+        c = np.zeros(self.form.n_var)
+        c[idx] = coef
+        self.z.Obj = c
+
+    def fix_vars(self, idx, lo, hi):
+        self.lb[idx] = lo
+        self.ub[idx] = hi
+        self.z.LB = self.lb
+        self.z.UB = self.ub
+
+    def set_start(self, z):
+        self.z.Start = np.round(z)
+
+    def add_row(self, idx, coef, lo, hi, name):
+        row = sp.csr_matrix((coef, (np.zeros(len(idx), dtype=np.int64), idx)), shape=(1, self.form.n_var))
+        if lo == hi:
+            self.m.addConstr(row @ self.z == hi, name=name)
+        else:
+            if np.isfinite(hi):
+                self.m.addConstr(row @ self.z <= hi, name=name)
+            if np.isfinite(lo):
+                self.m.addConstr(row @ self.z >= lo, name=name)
+
+    def solve(self, time_limit=None, mip_gap=None):
+        GRB, m = self.GRB, self.m
+        m.Params.TimeLimit = time_limit if time_limit is not None else GRB.INFINITY
+        m.Params.MIPGap = mip_gap if mip_gap is not None else self.gap_default
+        t0 = time.perf_counter()
+        m.optimize()
+        dt = time.perf_counter() - t0
+        if m.Status == GRB.OPTIMAL:
+            status = 'optimal'
+        elif m.Status in (GRB.TIME_LIMIT, GRB.INTERRUPTED):
+            status = 'time_limit'
+        elif m.Status in (GRB.INFEASIBLE, GRB.INF_OR_UNBD):
+            status = 'infeasible'
+        else:
+            status = 'error'
+        if m.SolCount == 0:
+            return SolveResult(status, None, None, None, dt)
+        bound = m.ObjVal if self.relax else m.ObjBound     # PL não tem ObjBound
+        return SolveResult(status, m.ObjVal, bound, np.asarray(self.z.X), dt)
+
+
+class HighsBackend(MipBackend):
+    name = 'highs'
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            import highspy  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def __init__(self, form: Formulation, threads: Optional[int] = None, verbose: bool = False,
+                 relax: bool = False):
+        super().__init__(form, threads, verbose, relax)
+        import highspy
+        self.hs = highspy
+        inf = highspy.kHighsInf
+        h = highspy.Highs()
+        h.setOptionValue('output_flag', bool(verbose))
+        if threads:
+            h.setOptionValue('threads', int(threads))
+        n, A = form.n_var, form.A
+        lp = highspy.HighsLp()
+        lp.num_col_ = n
+        lp.num_row_ = A.shape[0]
+        lp.col_cost_ = np.zeros(n)
+        lp.col_lower_ = np.zeros(n)
+        lp.col_upper_ = np.ones(n)
+        lp.row_lower_ = np.where(np.isfinite(form.lo), form.lo, -inf)
+        lp.row_upper_ = np.where(np.isfinite(form.hi), form.hi, inf)
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.start_ = A.indptr
+        lp.a_matrix_.index_ = A.indices
+        lp.a_matrix_.value_ = A.data
+        if not relax:
+            lp.integrality_ = [highspy.HighsVarType.kInteger] * n
+        h.passModel(lp)
+        self.h = h
+        gap = h.getOptionValue('mip_rel_gap')                  # o modelo é reusado entre níveis
+        self.gap_default = gap[-1] if isinstance(gap, tuple) else gap   # (status, valor) em algumas versões
+        self._all = np.arange(n, dtype=np.int32)
+
+    def set_objective(self, idx, coef):
+        c = np.zeros(self.form.n_var)
+        c[idx] = coef
+        self.h.changeColsCost(self.form.n_var, self._all, c)
+
+    def add_row(self, idx, coef, lo, hi, name):
+        inf = self.hs.kHighsInf
+        self.h.addRow(lo if np.isfinite(lo) else -inf, hi if np.isfinite(hi) else inf,
+                      len(idx), np.asarray(idx, dtype=np.int32), np.asarray(coef, dtype=np.float64))
+
+    def fix_vars(self, idx, lo, hi):
+        n = len(idx)
+        self.h.changeColsBounds(n, np.asarray(idx, dtype=np.int32), np.full(n, float(lo)), np.full(n, float(hi)))
+
+    def set_start(self, z):
+        sol = self.hs.HighsSolution()
+        sol.col_value = np.round(z).tolist()
+        self.h.setSolution(sol)
+
+    def solve(self, time_limit=None, mip_gap=None):
+        hs, h = self.hs, self.h
+        h.setOptionValue('time_limit', float(time_limit) if time_limit is not None else hs.kHighsInf)
+        h.setOptionValue('mip_rel_gap', float(mip_gap if mip_gap is not None else self.gap_default))
+        t0 = time.perf_counter()
+        h.run()
+        dt = time.perf_counter() - t0
+        st = h.getModelStatus()
+        MS = hs.HighsModelStatus
+        if st == MS.kOptimal:
+            status = 'optimal'
+        elif st in (MS.kTimeLimit, MS.kInterrupt):
+            status = 'time_limit'
+        elif st == MS.kInfeasible:
+            status = 'infeasible'
+        else:
+            status = 'error'
+        info = h.getInfo()
+        if info.primal_solution_status != 2:        # kSolutionStatusFeasible
+            return SolveResult(status, None, None, None, dt)
+        z = np.asarray(h.getSolution().col_value)
+        obj = info.objective_function_value
+        return SolveResult(status, obj, obj if self.relax else info.mip_dual_bound, z, dt)
+
+
+class CbcBackend(MipBackend):
+    name = 'cbc'
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            import pulp
+            return pulp.PULP_CBC_CMD(msg=False).available()
+        except ImportError:
+            return False
+
+    def __init__(self, form: Formulation, threads: Optional[int] = None, verbose: bool = False,
+                 relax: bool = False):
+        super().__init__(form, threads, verbose, relax)
+        import pulp
+        self.pulp = pulp
+        prob = pulp.LpProblem("Thompson_lex", pulp.LpMinimize)
+        z = [pulp.LpVariable(f"z{j}", cat=pulp.LpContinuous if relax else pulp.LpBinary,
+                              lowBound=0, upBound=1) for j in range(form.n_var)]
+        A, lo, hi = form.A, form.lo, form.hi
+        for r in range(A.shape[0]):
+            a, b = A.indptr[r], A.indptr[r + 1]
+            expr = pulp.LpAffineExpression(zip([z[j] for j in A.indices[a:b]], A.data[a:b].tolist()))
+            self._add(prob, expr, lo[r], hi[r], f"r{r}")
+        self.prob, self.z = prob, z
+        self.warm = False
+
+    def _add(self, prob, expr, lo, hi, name):
+        if lo == hi:
+            prob += (expr == hi, name)
+            return
+        if np.isfinite(hi):
+            prob += (expr <= hi, name + "_le")
+        if np.isfinite(lo):
+            prob += (expr >= lo, name + "_ge")
+
+    def set_objective(self, idx, coef):
+        z = self.z
+        self.prob.setObjective(self.pulp.LpAffineExpression(zip([z[j] for j in idx], np.asarray(coef).tolist())))
+
+    def add_row(self, idx, coef, lo, hi, name):
+        z = self.z
+        expr = self.pulp.LpAffineExpression(zip([z[j] for j in idx], np.asarray(coef).tolist()))
+        self._add(self.prob, expr, lo, hi, name)
+
+    def fix_vars(self, idx, lo, hi):
+        for j in np.asarray(idx).tolist():
+            self.z[j].lowBound = lo
+            self.z[j].upBound = hi
+
+    def set_start(self, z):
+        for var, val in zip(self.z, np.round(z).tolist()):
+            var.setInitialValue(val)
+        self.warm = True
+
+    def solve(self, time_limit=None, mip_gap=None):
+        pulp = self.pulp
+        kw = {'msg': self.verbose, 'warmStart': self.warm}
+        if time_limit is not None:
+            kw['timeLimit'] = time_limit
+        if mip_gap is not None:
+            kw['gapRel'] = mip_gap
+        if self.threads:
+            kw['threads'] = self.threads
+        t0 = time.perf_counter()
+        self.prob.solve(pulp.PULP_CBC_CMD(**kw))
+        dt = time.perf_counter() - t0
+        st = self.prob.sol_status
+        if st == pulp.LpSolutionOptimal:
+            status = 'optimal'
+        elif st == pulp.LpSolutionIntegerFeasible:
+            status = 'time_limit'
+        elif st == pulp.LpSolutionInfeasible:
+            status = 'infeasible'
+        else:
+            status = 'error'
+        if st not in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible):
+            return SolveResult(status, None, None, None, dt)
+        z = np.array([v.varValue or 0.0 for v in self.z])
+        obj = pulp.value(self.prob.objective) or 0.0
+        # o PuLP não expõe o limite dual; sem gapRel o CBC só declara ótimo
+        # com gap zero (cada solve é uma chamada nova, sem parâmetro herdado)
+        bound = obj if status == 'optimal' and (self.relax or mip_gap is None) else None
+        return SolveResult(status, obj, bound, z, dt)
+
+
+class ScipyBackend(MipBackend):
+    """
+    scipy.optimize.milp (HiGHS). Não é incremental (cada solve remonta o
+    modelo) e não aceita MIP start; para compensar, as colunas fixadas
+    (lb == ub) saem do modelo e vão para o lado direito antes de cada solve.
+    """
+    name = 'scipy'
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            from scipy.optimize import milp  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def __init__(self, form: Formulation, threads: Optional[int] = None, verbose: bool = False,
+                 relax: bool = False):
+        super().__init__(form, threads, verbose, relax)
+        self.c = np.zeros(form.n_var)
+        self.extra: List[sp.csr_matrix] = []
+        self.extra_lo: List[float] = []
+        self.extra_hi: List[float] = []
+        self.lb = np.zeros(form.n_var)
+        self.ub = np.ones(form.n_var)
+
+    def set_objective(self, idx, coef):
+        self.c = np.zeros(self.form.n_var)
+        self.c[idx] = coef
+
+    def add_row(self, idx, coef, lo, hi, name):
+        self.extra.append(sp.csr_matrix((coef, (np.zeros(len(idx), dtype=np.int64), idx)),
+                                        shape=(1, self.form.n_var)))
+        self.extra_lo.append(lo)
+        self.extra_hi.append(hi)
+
+    def fix_vars(self, idx, lo, hi):
+        self.lb[idx] = lo
+        self.ub[idx] = hi
+
+    def solve(self, time_limit=None, mip_gap=None):
+        from scipy.optimize import milp, LinearConstraint, Bounds
+        f = self.form
+        A = sp.vstack([f.A] + self.extra, format='csr') if self.extra else f.A
+        lo = np.concatenate([f.lo, self.extra_lo])
+        hi = np.concatenate([f.hi, self.extra_hi])
+        opts = {'disp': self.verbose}
+        if time_limit is not None:
+            opts['time_limit'] = time_limit
+        if mip_gap is not None:
+            opts['mip_rel_gap'] = mip_gap
+        t0 = time.perf_counter()
+        free = self.lb < self.ub
+        fixed_val = self.lb[~free]
+        A = A.tocsc()
+        shift = A[:, ~free] @ fixed_val
+        A = A[:, free].tocsr()
+        lo, hi = lo - shift, hi - shift
+        live = np.diff(A.indptr) > 0
+        # linhas sem colunas livres: só conferem a viabilidade do que foi fixado
+        if np.any(lo[~live] > 1e-9) or np.any(hi[~live] < -1e-9):
+            return SolveResult('infeasible', None, None, None, time.perf_counter() - t0)
+        n_free = int(free.sum())
+        res = milp(self.c[free], integrality=np.zeros(n_free) if self.relax else np.ones(n_free),
+                   bounds=Bounds(self.lb[free], self.ub[free]),
+                   constraints=LinearConstraint(A[live], lo[live], hi[live]), options=opts)
+        dt = time.perf_counter() - t0
+        status = {0: 'optimal', 1: 'time_limit', 2: 'infeasible'}.get(res.status, 'error')
+        if res.x is None:
+            return SolveResult(status, None, None, None, dt)
+        z = self.lb.copy()
+        z[free] = res.x
+        obj = float(res.fun) + float(self.c[~free] @ fixed_val)
+        bound = obj if self.relax else getattr(res, 'mip_dual_bound', None)
+        if bound is not None and not self.relax:
+            bound = float(bound) + float(self.c[~free] @ fixed_val)
+        return SolveResult(status, obj, bound, z, dt)
+
+
+BACKENDS = {
+    'gurobi': GurobiBackend,
+    'highs': HighsBackend,
+    'cbc': CbcBackend,
+    'scipy': ScipyBackend,
+}
+
+
+# 'auto' só escolhe backends já conferidos contra o scipy (smoke_check)
+AUTO_ORDER = ('highs', 'cbc', 'scipy')
+
+
+def make_backend(name: str, form: Formulation, threads: Optional[int] = None,
+                 verbose: bool = False, relax: bool = False) -> MipBackend:
+    """name='auto' escolhe o primeiro disponível na ordem de AUTO_ORDER."""
+    if name == 'auto':
+        for cls in (BACKENDS[n] for n in AUTO_ORDER):
+            if cls.available():
+                return cls(form, threads, verbose, relax)
+        raise RuntimeError("Nenhum backend MIP disponível (highspy, pulp ou scipy).")
+    if name not in BACKENDS:
+        raise ValueError(f"Backend desconhecido: {name!r} (opções: {', '.join(BACKENDS)}, auto)")
+    cls = BACKENDS[name]
+    if not cls.available():
+        raise RuntimeError(f"Backend {name!r} indisponível neste ambiente.")
+    return cls(form, threads, verbose, relax)
+
+
+# =========================
+# Sequência lexicográfica
+# =========================
+@dataclass
+class LevelInfo:
+    name: str
+    status: str
+    value: Optional[float]
+    bound: Optional[float]
+    runtime: float
+    time_limit: Optional[float] = None
+    mip_gap: Optional[float] = None
+    proven: bool = False    # ótimo provado: valor - limite dual <= tol
+    pruned: int = 0         # colunas fixadas em 0 por dominância após o nível
+    fixed: int = 0          # colunas fixadas no incumbente (fix_proven)
+
+
+@dataclass
+class LexResult:
+    backend: str
+    status: str             # 'optimal' | 'time_limit' | 'infeasible' | 'error'
+    z: Optional[np.ndarray]
+    levels: List[LevelInfo] = field(default_factory=list)
+    runtime: float = 0.0
+
+
+def _fix_hi(value: float, tol: float) -> float:
+    return value + tol * max(1.0, abs(value))
+
+
+def solve_lexicographic(form: Formulation, backend: MipBackend,
+                        time_limit: Optional[float] = None,
+                        mip_gap: Optional[float] = None,
+                        tol: float = 1e-6, verbose: bool = False,
+                        level_time_limit: Optional[float] = None,
+                        level_overrides: Optional[Dict[str, Dict[str, float]]] = None,
+                        start: Optional[np.ndarray] = None,
+                        warm_start: bool = True,
+                        prune: bool = True,
+                        fix_proven: bool = False) -> LexResult:
+    """
+    Minimiza os níveis de form.levels em ordem; após cada nível fixa
+    "nível <= valor obtido" (com folga relativa tol) e segue. Sem prova de
+    ótimo (limite de tempo/gap) o nível é fixado no valor do incumbente, que
+    continua viável. Ao estourar time_limit (total), devolve o último
+    incumbente com status 'time_limit'.
+
+    Controle por nível:
+      level_time_limit   teto de tempo de cada nível (além do total restante);
+      level_overrides    {nome do nível: {'time_limit': .., 'mip_gap': ..}}
+                         (ex.: 'unallocated', 'diss_E-01');
+      warm_start         o incumbente do nível anterior (ou start, no
+                         primeiro) vai como MIP start; ele continua viável
+                         depois da linha de fixação;
+      prune              com coeficientes >= 0, toda coluna com coeficiente
+                         acima do valor fixado só pode valer 0: fixa-as em 0
+                         (para um empregado, os arcos piores que o ótimo dele);
+      fix_proven         fixa os arcos de um empregado cujo nível foi provado
+                         ótimo no valor do incumbente. Acelera os níveis
+                         seguintes, mas deixa de ser exato (empates de
+                         mesmo custo não são mais reexaminados).
+
+    Se um nível estoura o próprio teto sem solução nova, o incumbente anterior
+    é mantido e a sequência continua no nível seguinte.
+    """
+    t0 = time.perf_counter()
+    res = LexResult(backend=backend.name, status='optimal', z=None)
+    overrides = level_overrides or {}
+    zero = np.zeros(form.n_var, dtype=bool)     # colunas já fixadas (não refixar)
+    if start is not None and warm_start:
+        backend.set_start(start)
+    for k, lv in enumerate(form.levels):
+        if k == 0 and form.level0_exact:
+            # LB de fluxo máximo é o ótimo: já fixado em cover_lb
+            res.levels.append(LevelInfo(lv.name, 'optimal', float(form.cover_lb), float(form.cover_lb), 0.0,
+                                        proven=True))
+            continue
+        ov = overrides.get(lv.name, {})
+        left = ov.get('time_limit', level_time_limit)
+        if time_limit is not None:
+            total_left = time_limit - (time.perf_counter() - t0)
+            if total_left <= 0:
+                res.status = 'time_limit'
+                break
+            left = total_left if left is None else min(left, total_left)
+        gap = ov.get('mip_gap', mip_gap)
+
+        backend.set_objective(lv.idx, lv.coef)
+        if warm_start and res.z is not None:
+            backend.set_start(res.z)
+        r = backend.solve(time_limit=left, mip_gap=gap)
+        info = LevelInfo(lv.name, r.status, r.obj, r.bound, r.runtime, time_limit=left, mip_gap=gap)
+        res.levels.append(info)
+
+        z, value = r.z, r.obj
+        if z is None:
+            if r.status != 'time_limit' or res.z is None:
+                res.status = r.status
+                break
+            # teto do nível sem solução nova: segue com o incumbente anterior
+            z, value = res.z, float(lv.coef @ res.z[lv.idx])
+            info.value = value
+        res.z = z
+        # só o limite dual devolvido prova o ótimo; status 'optimal' com gap
+        # (pedido ou padrão do solver) não basta para fix_proven
+        info.proven = r.bound is not None and value - r.bound <= tol * max(1.0, abs(value))
+        if not info.proven:
+            res.status = 'time_limit'
+
+        hi = _fix_hi(value, tol)
+        backend.add_row(lv.idx, lv.coef, -np.inf, hi, f"lex_{k}")
+        if prune:
+            cols = lv.idx[(lv.coef > hi) & ~zero[lv.idx]]
+            if len(cols):
+                backend.fix_vars(cols, 0.0, 0.0)
+                zero[cols] = True
+                info.pruned = len(cols)
+        if fix_proven and info.proven and k > 0:
+            cols = lv.idx[~zero[lv.idx]]
+            on = cols[z[cols] > 0.5]
+            off = cols[z[cols] <= 0.5]
+            if len(on):
+                backend.fix_vars(on, 1.0, 1.0)
+            if len(off):
+                backend.fix_vars(off, 0.0, 0.0)
+            zero[cols] = True
+            info.fixed = len(cols)
+        if verbose:
+            print(f"  [LEX] {lv.name}: {info.status} valor={info.value} ({info.runtime:.2f}s, "
+                  f"podados={info.pruned}, fixados={info.fixed})")
+    res.runtime = time.perf_counter() - t0
+    return res
+
+
+def level_report(res: LexResult, top: Optional[int] = None) -> str:
+    """Tabela de tempo por nível; com top, só os níveis mais caros."""
+    levels = res.levels
+    if top is not None:
+        levels = sorted(levels, key=lambda lv: lv.runtime, reverse=True)[:top]
+    total = sum(lv.runtime for lv in res.levels) or 1.0
+    lines = [f"{'nível':<16}{'status':<12}{'valor':>12}{'tempo(s)':>10}{'%':>7}{'podados':>9}{'fixados':>9}"]
+    for lv in levels:
+        val = f"{lv.value:.2f}" if lv.value is not None else "-"
+        status = lv.status + ('' if lv.proven else '*')
+        lines.append(f"{lv.name:<16}{status:<12}{val:>12}{lv.runtime:>10.2f}"
+                     f"{100 * lv.runtime / total:>7.1f}{lv.pruned:>9}{lv.fixed:>9}")
+    lines.append(f"(* = sem prova de ótimo)  total: {res.runtime:.2f}s")
+    return "\n".join(lines)
+
+
+def write_level_csv(path: str, res: LexResult) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=list(LevelInfo.__dataclass_fields__))
+        w.writeheader()
+        for lv in res.levels:
+            w.writerow(vars(lv))
+
+
+def result_payload(form: Formulation, res: LexResult) -> Dict[str, object]:
+    """Mesmas chaves do resultado_temp.json dos scripts Gurobi, mais backend e níveis."""
+    I = form.I
+    payload: Dict[str, object] = {
+        "status": "Solucao Encontrada" if res.z is not None else "Sem Solucao",
+        "backend": res.backend,
+        "status_lex": res.status,
+        "tempo_execucao_seg": res.runtime,
+        "niveis": [vars(lv) for lv in res.levels],
+    }
+    if res.z is not None:
+        assign = assign_from_values(form, res.z)
+        aloc = {e: [] for e in I.E}
+        for s in np.flatnonzero(assign >= 0).tolist():
+            aloc[I.E[assign[s]]].append(I.S[s])
+        payload["objetivo_nivel_0_nao_alocados"] = int((assign < 0).sum())
+        payload["alocacoes"] = aloc
+        payload["turnos_nao_alocados"] = [I.S[s] for s in np.flatnonzero(assign < 0).tolist()]
+    return payload
+
+
+def smoke_check(form: Formulation, n_levels: Optional[int] = None,
+                time_limit: Optional[float] = None, tol: float = 1e-6) -> Dict[str, str]:
+    """
+    Teste de equivalência dos backends: cada um disponível resolve a
+    sequência lexicográfica (os n_levels primeiros níveis; None = todos) e,
+    na relaxação (relax=True), um nível antes e depois de fixar colunas no
+    mesmo modelo (a reotimização usada por hojati.py). O vetor de níveis
+    ótimo é único, então tem de bater com o do scipy. Devolve {backend: 'ok' |
+    'indisponível' | 'divergente: ...' | 'erro: ...'}.
+    """
+    small = replace(form, levels=form.levels[:n_levels])
+    lv = form.levels[1] if len(form.levels) > 1 else form.levels[0]
+    fix = lv.idx[:max(1, len(lv.idx) // 2)]
+
+    def run(name: str) -> List[float]:
+        mip = solve_lexicographic(small, make_backend(name, small), time_limit=time_limit, tol=tol)
+        if mip.status != 'optimal':
+            raise RuntimeError(f"MIP terminou com status {mip.status}")
+        vals = [lvl.value for lvl in mip.levels]
+        lp = make_backend(name, form, relax=True)
+        lp.set_objective(lv.idx, lv.coef)
+        for step in range(2):
+            r = lp.solve(time_limit=time_limit)
+            if r.status != 'optimal':
+                raise RuntimeError(f"PL terminou com status {r.status}")
+            vals.append(r.obj)
+            if step == 0:
+                lp.fix_vars(fix, 0.0, 0.0)
+        return vals
+
+    ref = run('scipy')
+    out: Dict[str, str] = {'scipy': 'ok'}
+    for name, cls in BACKENDS.items():
+        if name == 'scipy':
+            continue
+        if not cls.available():
+            out[name] = 'indisponível'
+            continue
+        try:
+            vals = run(name)
+        except Exception as exc:
+            out[name] = f"erro: {type(exc).__name__}: {exc}"
+            continue
+        bad = [k for k, (a, b) in enumerate(zip(vals, ref)) if abs(a - b) > 1e-6 * max(1.0, abs(b))]
+        if len(vals) != len(ref) or bad:
+            out[name] = f"divergente nas posições {bad[:10]}: {vals} != {ref}"
+        else:
+            out[name] = 'ok'
+    return out
+
+
+# =========================
+# Execução como script
+# =========================
+if __name__ == "__main__":
+    from grasp_thompson_new3 import load_instance, solution_from_assign, lex_cost, ThompsonGRASP
+    from precompute_cache import DerivedCache
+
+    ap = argparse.ArgumentParser(description="Lexicográfico exato com backend MIP plugável.")
+    ap.add_argument('instance', help="instancia_*.py ou .nbi")
+    ap.add_argument('--backend', nargs='+', default=['auto'],
+                    help=f"um ou mais de: auto ({'/'.join(AUTO_ORDER)}), {', '.join(BACKENDS)} "
+                         "(gurobi não executado: veja --smoke)")
+    ap.add_argument('--time-limit', type=float, default=1800.0, help="limite total por backend (s)")
+    ap.add_argument('--gap', type=float, default=None, help="gap relativo por nível")
+    ap.add_argument('--level-time-limit', type=float, default=None, help="teto de tempo por nível (s)")
+    ap.add_argument('--level0-time-limit', type=float, default=None, help="teto só do nível 0 (s)")
+    ap.add_argument('--no-warm-start', action='store_true', help="não passa o incumbente como MIP start")
+    ap.add_argument('--no-prune', action='store_true', help="não fixa em 0 os arcos dominados")
+    ap.add_argument('--fix-proven', action='store_true',
+                    help="fixa empregados com nível provado ótimo (heurístico)")
+    ap.add_argument('--grasp-start', type=float, default=0.0,
+                    help="roda o GRASP por N s e usa a solução como MIP start do nível 0 "
+                         "(o GRASP não impõe (6)/(7): o start só é viável com --no-seniority-link)")
+    ap.add_argument('--threads', type=int, default=None)
+    ap.add_argument('--atleast-one', action='store_true', help="inclui a restrição (3)")
+    ap.add_argument('--no-seniority-link', action='store_true', help="remove as linhas (6)/(7)")
+    ap.add_argument('--json', default=None, help="grava o resultado (um arquivo por backend: <json>_<backend>.json)")
+    ap.add_argument('--report', default=None, help="CSV de tempo por nível (<report>_<backend>.csv)")
+    ap.add_argument('--smoke', action='store_true',
+                    help="só o teste de equivalência: compara cada backend instalado com o scipy")
+    ap.add_argument('--smoke-levels', type=int, default=None,
+                    help="com --smoke, só os N primeiros níveis (padrão: todos)")
+    ap.add_argument('--verbose', action='store_true')
+    args = ap.parse_args()
+
+    I = load_instance(args.instance, cache=DerivedCache(), require_candidates=False)
+    t = time.perf_counter()
+    form = build_formulation(I, atleast_one=args.atleast_one,
+                             seniority_link=not args.no_seniority_link)
+    print(f"[INFO] Formulação: {form.n_var} variáveis, {form.A.shape[0]} linhas, "
+          f"{len(form.levels)} níveis ({time.perf_counter() - t:.2f}s); LB nível 0 = {form.cover_lb}")
+    if args.smoke:
+        for name, verdict in smoke_check(form, n_levels=args.smoke_levels).items():
+            print(f"  [SMOKE] {name}: {verdict}")
+        raise SystemExit(0)
+
+    start = None
+    if args.grasp_start > 0:
+        best = ThompsonGRASP(I, max_time_sec=args.grasp_start).run()[0]
+        start = values_from_assign(form, best.assign)
+        print(f"[INFO] MIP start do GRASP: {len(best.unassigned)} não alocados")
+    overrides = {}
+    if args.level0_time_limit is not None:
+        overrides['unallocated'] = {'time_limit': args.level0_time_limit}
+
+    for name in args.backend:
+        try:
+            backend = make_backend(name, form, threads=args.threads, verbose=args.verbose)
+        except (RuntimeError, ValueError) as exc:
+            print(f"[ERRO] {exc}")
+            continue
+        res = solve_lexicographic(form, backend, time_limit=args.time_limit,
+                                  mip_gap=args.gap, verbose=args.verbose,
+                                  level_time_limit=args.level_time_limit,
+                                  level_overrides=overrides, start=start,
+                                  warm_start=not args.no_warm_start,
+                                  prune=not args.no_prune, fix_proven=args.fix_proven)
+        line = f"[{backend.name}] status={res.status} tempo={res.runtime:.2f}s níveis={len(res.levels)}/{len(form.levels)}"
+        if res.z is not None:
+            cost = lex_cost(I, solution_from_assign(I, assign_from_values(form, res.z).tolist()))
+            line += f" não_alocados={int(cost.comp[0])} insat_E1={cost.comp[1]:.2f}"
+        print(line)
+        print(level_report(res, top=10))
+        if args.report:
+            out = f"{os.path.splitext(args.report)[0]}_{backend.name}.csv"
+            write_level_csv(out, res)
+            print(f"  tempos por nível salvos em '{out}'")
+        if args.json:
+            out = f"{os.path.splitext(args.json)[0]}_{backend.name}.json"
+            with open(out, "w", encoding="utf-8") as f:
+                json.dump(result_payload(form, res), f, ensure_ascii=False, indent=4)
+            print(f"  resultado salvo em '{out}'")
@@ -3,6 +3,10 @@
 import gurobipy as gp
 from gurobipy import GRB, quicksum
 
+from grasp_thompson_new3 import ThompsonInstance
+from precompute_cache import DerivedCache
+from coverage_bound import coverage_bound
+
 # -------------------------------------------------------------
 # 0) DADOS (cole aqui exatamente os dicionários que você enviou)
 # -------------------------------------------------------------
@@ -178,26 +182,22 @@ De_e  = { e: set(days) - Un_e[e] for e in E }
 # -------------------------------------------------------------
 LAMBDA_LUNCH = 0.0  # ajuste se quiser penalizar almoço (ex.: 1.0)
 
-def diss(e, s):
-    ste = ST_e[e]
-    sts = ST_s[s]
-    if sts < ste:
-        pen_start = ES_e[e] * (ste - sts)
-    else:
-        pen_start = LS_e[e] * (sts - ste)
-    pen_lunch = LAMBDA_LUNCH * abs(BL_s[s] - LL_e[e])
-    return pen_start + pen_lunch
-
 # -------------------------------------------------------------
 # 4) ELEGIBILIDADE: (TT_s ∈ Ce_e) e (d_s ∈ De_e)
+#    ES e v_es saem do mesmo pré-processamento do GRASP (ThompsonInstance),
+#    reaproveitado do cache em disco entre execuções (precompute_cache.py).
 # -------------------------------------------------------------
-ES = set()
-v_es = {}
-for e in E:
-    for s in S:
-        if (TT_s[s] in Ce_e[e]) and (d_s[s] in De_e[e]):
-            ES.add((e, s))
-            v_es[(e, s)] = diss(e, s)
+inst = ThompsonInstance(employee_data, shift_data, shift_requirements,
+                        LAMBDA_LUNCH=LAMBDA_LUNCH, cache=DerivedCache(),
+                        require_candidates=False)
+ES = inst.ES
+v_es = inst.v_es
+
+# Listas de adjacência dos arcos elegíveis, montadas uma vez: cada linha do
+# modelo percorre só os seus arcos em vez de varrer E×S testando (e, s) in ES.
+S_e  = inst.eligible_sorted        # e -> ocorrências elegíveis
+E_s  = inst.eligible_by_occ        # s -> empregados elegíveis
+S_ed = inst.eligible_by_emp_day    # (e, dia) -> ocorrências elegíveis nesse dia
 
 # -------------------------------------------------------------
 # 5) MODELO E VARIÁVEIS
@@ -205,7 +205,7 @@ for e in E:
 m = gp.Model("Thompson_1997_instances")
 
 # x[e,s] binária
-x = m.addVars(list(ES), vtype=GRB.BINARY, name="x")
+x = m.addVars([(e, s) for e in E for s in S_e[e]], vtype=GRB.BINARY, name="x")
 
 # u[s] binária: 1 se a ocorrência s ficou sem cobertura
 u = m.addVars(S, vtype=GRB.BINARY, name="u")
@@ -217,23 +217,26 @@ y = m.addVars(E, vtype=GRB.BINARY, name="y")
 # 6) RESTRIÇÕES
 # -------------------------------------------------------------
 
+# Carga de cada empregado (usada em (3), (4), (6) e (7))
+load_e = {e: quicksum(x[e, s] for s in S_e[e]) for e in E}
+
 # (2) Cobertura de cada ocorrência: sum_e x[e,s] + u[s] = 1
 for s in S:
-    m.addConstr(quicksum(x[e, s] for e in E if (e, s) in ES) + u[s] == 1, name=f"cover_{s}")
+    m.addConstr(quicksum(x[e, s] for e in E_s[s]) + u[s] == 1, name=f"cover_{s}")
 
 # (3) Pelo menos um turno por empregado
 for e in E:
-    m.addConstr(quicksum(x[e, s] for s in S if (e, s) in ES) >= 1, name=f"atleast1_{e}")
+    m.addConstr(load_e[e] >= 1, name=f"atleast1_{e}")
 
 # (4) No máximo m_e por empregado
 for e in E:
-    m.addConstr(quicksum(x[e, s] for s in S if (e, s) in ES) <= m_e[e], name=f"max_{e}")
+    m.addConstr(load_e[e] <= m_e[e], name=f"max_{e}")
 
 # (5) No máximo 1 turno por dia e por empregado
 for e in E:
     for day in De_e[e]:  # só faz sentido nos dias em que ele pode trabalhar
         m.addConstr(
-            quicksum(x[e, s] for s in S if ((e, s) in ES and d_s[s] == day)) <= 1,
+            quicksum(x[e, s] for s in S_ed[e, day]) <= 1,
             name=f"oneday_{e}_{day}"
         )
 
@@ -243,7 +246,7 @@ for i in range(1, len(E)):
     e = E[i]
     e_prev = E[i - 1]
     m.addConstr(
-        quicksum(x[e, s] for s in S if (e, s) in ES) <= 1 + (m_e[e] - 1) * y[e_prev],
+        load_e[e] <= 1 + (m_e[e] - 1) * y[e_prev],
         name=f"seniority_up_{e}"
     )
 
@@ -252,10 +255,17 @@ for i in range(1, len(E)):
 for i in range(0, len(E) - 1):
     e = E[i]
     m.addConstr(
-        m_e[e] * y[e] <= quicksum(x[e, s] for s in S if (e, s) in ES),
+        m_e[e] * y[e] <= load_e[e],
         name=f"seniority_flag_{e}"
     )
 
+# Limite exato do nível 0 sem as linhas de senioridade (coverage_bound.py,
+# fluxo máximo): corte válido sum_s u[s] >= LB. Com ele o Gurobi fecha o
+# nível 0 assim que uma solução atinge LB, sem precisar provar o ótimo.
+cov = coverage_bound(inst)
+m.addConstr(quicksum(u[s] for s in S) >= cov.min_uncovered, name="cover_lb")
+print(f"[INFO] Limite inferior de turnos não alocados (fluxo máximo): {cov.min_uncovered}")
+
 # -------------------------------------------------------------
 # 7) MULTIOBJETIVO LEXICOGRÁFICO (PREEMPTIVO)
 #     Nível 1: minimizar não-alocados
@@ -271,7 +281,7 @@ m.setObjectiveN(obj_unalloc, index=0, priority=prio_unalloc, weight=1.0, name="u
 # Empregados: E[0] é mais sênior -> maior prioridade
 for i, e in enumerate(E):
     prio_e = len(E) - i
-    obj_e = P_e[e] * quicksum(v_es[e, s] * x[e, s] for s in S if (e, s) in ES)
+    obj_e = P_e[e] * quicksum(v_es[e, s] * x[e, s] for s in S_e[e])
     m.setObjectiveN(obj_e, index=i + 1, priority=prio_e, weight=1.0, name=f"diss_{e}")
 
 m.ModelSense = GRB.MINIMIZE
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Cache persistente (em disco) dos dados derivados de uma instância.
+
+Elegibilidade, custos v_es e listas elegíveis ordenadas dependem apenas das
+tabelas da instância e de LAMBDA_LUNCH. A chave do cache é o SHA-256 desse
+conteúdo, então o mesmo arquivo de cache serve para qualquer processo ou
+execução (GRASP, scripts Gurobi) que carregue a mesma instância, venha ela
+de um .py ou de um .nbi.
+
+Cada entrada é um .npz; a pasta é limitada a max_bytes, removendo primeiro
+as entradas usadas há mais tempo (mtime é atualizado a cada acerto).
+"""
+from __future__ import annotations
+import os, json, hashlib, zipfile
+from typing import Dict, Optional
+
+import numpy as np
+
+from instance_format import InstanceTables, ARRAY_NAMES
+
+# Incrementar quando o conteúdo/formato dos dados derivados mudar
+FORMAT_VERSION = 1
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def default_cache_dir() -> str:
+    return os.environ.get('NBTEL_CACHE_DIR') or os.path.join(
+        os.path.expanduser('~'), '.cache', 'nbtel-optimization')
+
+
+class DerivedCache:
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(tables: InstanceTables, lambda_lunch: float) -> str:
+        h = hashlib.sha256()
+        h.update(f"v{FORMAT_VERSION}|{float(lambda_lunch)!r}|".encode())
+        h.update(json.dumps([tables.days, tables.emp_ids, tables.req_days]).encode('utf-8'))
+        for name in ARRAY_NAMES:
+            a = np.ascontiguousarray(getattr(tables, name))
+            h.update(f"|{name}|{a.dtype.str}|{a.shape}|".encode())
+            h.update(a.tobytes())
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def load(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as z:
+                data = {k: z[k] for k in z.files}
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+            # entrada corrompida (ex.: processo interrompido): descarta
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)  # marca como usada recentemente (LRU)
+        except OSError:
+            pass
+        return data
+
+    def store(self, key: str, arrays: Dict[str, np.ndarray]) -> None:
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp, path)  # atômico: outros processos nunca veem arquivo parcial
+        except OSError as e:
+            print(f"  [AVISO] Falha ao gravar cache em {path}: {e}")
+            self._remove(tmp)
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for fname in os.listdir(self.cache_dir):
+            if not fname.endswith('.npz'):
+                continue
+            path = os.path.join(self.cache_dir, fname)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self) -> None:
+        for fname in os.listdir(self.cache_dir):
+            if fname.endswith('.npz'):
+                self._remove(os.path.join(self.cache_dir, fname))
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass